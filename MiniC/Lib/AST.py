@@ -0,0 +1,416 @@
+"""
+Compact abstract syntax tree of MiniC programs, lowered from the ANTLR
+parse tree by :py:func:`lower` before typing, evaluation and code generation.
+
+ANTLR contexts are heavyweight: each one carries its parser, its parent,
+its start and stop tokens, and each token of the program is a
+``CommonToken`` wrapped in a ``TerminalNodeImpl``.
+The nodes of the compact AST only keep a tuple of children and a
+source position, in ``__slots__``:
+
+- there is one node class per context class of the parser, with the
+  same name minus the ``Context`` suffix (e.g. ``AdditiveExpr``);
+- tokens are :py:class:`Terminal` objects shared by all their
+  occurrences, so that identifiers and operators are interned
+  (``ctx.myop.type`` is one of the token types of ``MiniCParser``);
+- positions are :py:class:`Position` objects, shared by all the nodes
+  starting at the same token;
+- the indices of the children of each rule and token type are computed
+  once, when a node is built, and shared by the nodes whose children
+  have the same kinds (see :py:func:`_shape`).
+
+The nodes have the accessors of the contexts (``ctx.expr(0)``,
+``ctx.ID()``, ``ctx.myop``, ``ctx.start.line``, ``ctx.getText()``...)
+and accept the same visitors, so the visitors of the labs run
+on them unchanged.
+"""
+
+import inspect
+import marshal
+import sys
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+from antlr4 import ParserRuleContext
+from antlr4.Token import Token
+from antlr4.tree.Tree import RuleNode, TerminalNodeImpl
+from antlr4.Utils import escapeWhitespace
+
+from MiniCParser import MiniCParser
+
+
+class Position:
+    """Position of the start of a node in the source file."""
+
+    __slots__ = ('line', 'column')
+
+    def __init__(self, line: int, column: int):
+        self.line = line
+        self.column = column
+
+    def __repr__(self):
+        return "Position({}, {})".format(self.line, self.column)
+
+
+class Terminal:
+    """
+    A token of the program: its type (e.g. ``MiniCParser.PLUS``)
+    and its text. Equal tokens are represented by the same object.
+    """
+
+    __slots__ = ('type', 'text')
+
+    # No rule for terminals (see Node._rule)
+    _rule = None
+
+    def __init__(self, ttype: int, text: str):
+        self.type = ttype
+        self.text = text
+
+    @property
+    def symbol(self) -> 'Terminal':
+        """The token itself, as for the terminal nodes of ANTLR."""
+        return self
+
+    def getSymbol(self) -> 'Terminal':
+        return self
+
+    def getText(self) -> str:
+        return self.text
+
+    def getChildCount(self) -> int:
+        return 0
+
+    def accept(self, visitor):
+        return visitor.visitTerminal(self)
+
+    def toStringTree(self, ruleNames=None, recog=None) -> str:
+        return escapeWhitespace(self.text, False)
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return "Terminal({}, {!r})".format(self.type, self.text)
+
+
+if TYPE_CHECKING:
+    # For the type checker, nodes are parse trees accepted by the visitors.
+    # At runtime, RuleNode would give the nodes a __dict__.
+    _NodeBase = RuleNode
+else:
+    _NodeBase = object
+
+
+class Node(_NodeBase):
+    """Base class of the nodes of the AST."""
+
+    __slots__ = ('children', 'start', '_shape')
+
+    children: Tuple['Node | Terminal', ...]
+    start: Position
+    #: Indices of the children, by rule name or token type (see _shape)
+    _shape: Dict[str | int, Tuple[int, ...]]
+
+    #: Name of the rule of the grammar the node comes from (e.g. 'expr')
+    _rule: str
+    _rule_index: int
+    #: Name of the method of the visitors for this kind of node
+    _visit: str
+    #: Names of the labels of the grammar (e.g. 'myop')
+    _labels: Tuple[str, ...] = ()
+
+    def accept(self, visitor):
+        method = getattr(visitor, self._visit, None)
+        if method is None:
+            return visitor.visitChildren(self)
+        return method(self)
+
+    def getChildCount(self) -> int:
+        return len(self.children)
+
+    def getChild(self, i: int) -> 'Node | Terminal':
+        return self.children[i]
+
+    def getChildren(self):
+        return iter(self.children)
+
+    def getRuleIndex(self) -> int:
+        return self._rule_index
+
+    def getAltNumber(self) -> int:
+        return 0
+
+    def getText(self) -> str:
+        children = self.children
+        if len(children) == 1:
+            return children[0].getText()
+        return "".join(c.getText() for c in children)
+
+    def toStringTree(self, ruleNames=None, recog=None) -> str:
+        """Return the tree in LISP format, as ANTLR's Trees.toStringTree."""
+        if not self.children:
+            return self._rule
+        return "({} {})".format(
+            self._rule, " ".join(c.toStringTree() for c in self.children))
+
+    def __repr__(self):
+        return "<{} at {}:{}>".format(type(self).__name__,
+                                      self.start.line, self.start.column)
+
+
+# Shapes of the nodes, by kinds of their children
+_SHAPES: Dict[Tuple[str | int, ...], Dict[str | int, Tuple[int, ...]]] = dict()
+
+
+def _shape(children) -> Dict[str | int, Tuple[int, ...]]:
+    """
+    Return the indices of the `children` of a node, by kind: the name of
+    the rule of the child, or the type of the token.
+    Nodes whose children have the same kinds share the same dictionary.
+    """
+    kinds = tuple([c.type if c._rule is None else c._rule for c in children])
+    shape = _SHAPES.get(kinds)
+    if shape is None:
+        indices: Dict[str | int, List[int]] = dict()
+        for i, kind in enumerate(kinds):
+            indices.setdefault(kind, []).append(i)
+        shape = _SHAPES[kinds] = {kind: tuple(idx) for kind, idx in indices.items()}
+    return shape
+
+
+def _accessor(kind: str | int, several: bool):
+    """
+    Accessor to the children of kind `kind` (a rule name or a token type),
+    as in the parser: with `several`, ``ctx.expr()`` is the list of the
+    children and ``ctx.expr(i)`` the i-th one (or None), otherwise
+    ``ctx.ID()`` is the only child (or None).
+    """
+    def nth(self, i: int | None = None):
+        indices = self._shape.get(kind, ())
+        if i is None:
+            children = self.children
+            return [children[j] for j in indices]
+        return self.children[indices[i]] if i < len(indices) else None
+
+    def first(self):
+        indices = self._shape.get(kind)
+        return self.children[indices[0]] if indices else None
+
+    return nth if several else first
+
+
+# Attributes common to all the contexts; the other ones are labels
+# of the grammar (e.g. myop), set by the generated parser.
+_CONTEXT_ATTRS = {"parentCtx", "invokingState", "children",
+                  "start", "stop", "exception", "parser"}
+
+
+def _labels_of(ctx_class) -> Tuple[str, ...]:
+    """Return the names of the labels of the contexts of class `ctx_class`."""
+    base = ctx_class.__mro__[1]
+    if base is ParserRuleContext:
+        ctx = ctx_class(None)
+    else:
+        # Context of a labeled alternative, built from the context of its rule
+        ctx = ctx_class(None, base(None))
+    return tuple(attr for attr in vars(ctx) if attr not in _CONTEXT_ATTRS)
+
+
+def _make_node_class(ctx_class) -> type:
+    """Return the node class corresponding to the context class `ctx_class`."""
+    name = ctx_class.__name__[:-len("Context")]
+    labels = _labels_of(ctx_class)
+    namespace = {
+        '__slots__': labels,
+        '__doc__': "Node lowered from :py:class:`MiniCParser.{}`.".format(
+            ctx_class.__name__),
+        '__module__': __name__,
+        '_rule': MiniCParser.ruleNames[ctx_class.getRuleIndex(None)],
+        '_rule_index': ctx_class.getRuleIndex(None),
+        '_visit': "visit" + name,
+        '_labels': labels,
+    }
+    for attr, method in vars(ctx_class).items():
+        if (not inspect.isfunction(method) or attr.startswith('_')
+                or attr in ('getRuleIndex', 'accept', 'copyFrom')):
+            continue
+        several = len(inspect.signature(method).parameters) > 1
+        kind = attr if attr in MiniCParser.ruleNames else getattr(MiniCParser, attr)
+        namespace[attr] = _accessor(kind, several)
+    return type(name, (Node,), namespace)
+
+
+def _make_node_classes() -> Dict[str, type]:
+    classes = dict()
+    for attr, value in vars(MiniCParser).items():
+        if (isinstance(value, type) and issubclass(value, ParserRuleContext)
+                and attr.endswith("Context")):
+            classes[attr] = _make_node_class(value)
+    return classes
+
+
+# Node class for each context class name of the parser
+_NODE_CLASSES = _make_node_classes()
+globals().update({cls.__name__: cls for cls in _NODE_CLASSES.values()})
+
+
+class _Interner:
+    """Shared terminals and positions of a tree."""
+
+    def __init__(self):
+        self.terminals: Dict[Tuple[int, str], Terminal] = dict()
+        self.positions: Dict[Tuple[int, int], Position] = dict()
+
+    def terminal(self, ttype: int, text: str) -> Terminal:
+        key = (ttype, text)
+        term = self.terminals.get(key)
+        if term is None:
+            term = self.terminals[key] = Terminal(ttype, sys.intern(text))
+        return term
+
+    def position(self, line: int, column: int) -> Position:
+        key = (line, column)
+        pos = self.positions.get(key)
+        if pos is None:
+            pos = self.positions[key] = Position(line, column)
+        return pos
+
+
+def _new_node(cls, children: List, start: Position, label_values) -> Node:
+    node = cls.__new__(cls)
+    node.children = tuple(children)
+    node.start = start
+    node._shape = _shape(children)
+    for attr, value in zip(cls._labels, label_values):
+        setattr(node, attr, value)
+    return node
+
+
+def lower(tree: ParserRuleContext) -> Node:
+    """
+    Return the AST of the parse tree `tree`, which must have been built
+    without syntax errors.
+    """
+    interner = _Interner()
+    # Iterative post-order traversal, so that deep trees do not need
+    # deep recursion. Each entry is a context and its lowered children.
+    stack: List[Tuple[ParserRuleContext, List]] = [(tree, [])]
+    todo: List = [list(reversed(tree.children or ()))]
+    while True:
+        if todo[-1]:
+            child = todo[-1].pop()
+            if isinstance(child, TerminalNodeImpl):
+                tok = child.symbol
+                stack[-1][1].append(interner.terminal(tok.type, tok.text))
+            else:
+                stack.append((child, []))
+                todo.append(list(reversed(child.children or ())))
+            continue
+        todo.pop()
+        ctx, children = stack.pop()
+        label_values = []
+        cls = _NODE_CLASSES[type(ctx).__name__]
+        for attr in cls._labels:
+            value = getattr(ctx, attr)
+            if isinstance(value, Token):
+                value = interner.terminal(value.type, value.text)
+            elif value is not None:
+                assert ctx.children is not None
+                value = children[ctx.children.index(value)]
+            label_values.append(value)
+        assert ctx.start is not None
+        node = _new_node(cls, children,
+                         interner.position(ctx.start.line, ctx.start.column),
+                         label_values)
+        if not stack:
+            return node
+        stack[-1][1].append(node)
+
+
+# Kinds of labels in the serialized tree
+_NONE, _TOKEN, _CHILD = range(3)
+
+
+def dump_ast(ast: Node) -> bytes:
+    """
+    Serialize `ast`. The tree is stored as the list of its nodes in prefix
+    order (so that deep trees do not need deep recursion), with the tables
+    of its terminals and positions.
+    """
+    terminals: Dict[Terminal, int] = dict()
+    positions: Dict[Position, int] = dict()
+    nodes: List = []
+    todo: List = [ast]
+    while todo:
+        node = todo.pop()
+        if isinstance(node, Terminal):
+            nodes.append(terminals.setdefault(node, len(terminals)))
+            continue
+        labels = []
+        for attr in node._labels:
+            value = getattr(node, attr)
+            if value is None:
+                labels.append((_NONE, 0))
+            elif isinstance(value, Terminal):
+                labels.append((_TOKEN, terminals.setdefault(value, len(terminals))))
+            else:
+                labels.append((_CHILD, node.children.index(value)))
+        nodes.append((type(node).__name__ + "Context", len(node.children),
+                      positions.setdefault(node.start, len(positions)),
+                      tuple(labels)))
+        todo.extend(reversed(node.children))
+    return marshal.dumps((sys.version_info[:2],
+                          [(t.type, t.text) for t in terminals],
+                          [(p.line, p.column) for p in positions],
+                          nodes))
+
+
+def load_ast(data: bytes) -> Node | None:
+    """
+    Rebuild an AST serialized by :py:func:`dump_ast`.
+    Return None if the data was written by another version of Python,
+    or is corrupted (e.g. a cache file truncated by a full disk).
+    """
+    try:
+        return _rebuild_ast(data)
+    except (ValueError, EOFError, TypeError, IndexError, KeyError):
+        return None
+
+
+def _rebuild_ast(data: bytes) -> Node | None:
+    version, terminal_table, position_table, nodes = marshal.loads(data)
+    if tuple(version) != sys.version_info[:2]:
+        return None
+    terminals = [Terminal(ttype, sys.intern(text)) for ttype, text in terminal_table]
+    positions = [Position(line, column) for line, column in position_table]
+    # Nodes whose children are being built: class, number of children,
+    # position, labels and children built so far.
+    stack: List[Tuple[type, int, Position, Tuple, List]] = []
+    for entry in nodes:
+        if isinstance(entry, int):
+            value = terminals[entry]
+        else:
+            name, nb_children, position, labels = entry
+            stack.append((_NODE_CLASSES[name], nb_children,
+                          positions[position], labels, []))
+            if nb_children > 0:
+                continue
+            value = None
+        # Build the nodes that are complete
+        while True:
+            if value is not None:
+                if not stack:
+                    if not isinstance(value, Node):
+                        raise ValueError("Invalid AST")
+                    return value
+                stack[-1][4].append(value)
+            cls, nb_children, position, labels, children = stack[-1]
+            if len(children) < nb_children:
+                break
+            stack.pop()
+            value = _new_node(cls, children, position,
+                              [None if kind == _NONE
+                               else terminals[index] if kind == _TOKEN
+                               else children[index]
+                               for kind, index in labels])
+    raise ValueError("Truncated AST")
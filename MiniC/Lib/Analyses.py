@@ -0,0 +1,159 @@
+"""
+Analyses of a :py:class:`CFG <Lib.CFG.CFG>`, computed on demand and
+cached by its :py:class:`AnalysisManager`, available as ``cfg.analyses``.
+
+An analysis is a function computing a result from a CFG, registered
+with :py:func:`register_analysis` under a name, with the parts of the CFG
+it depends on: its :py:data:`STRUCTURE` (blocks and edges) and/or its
+:py:data:`INSTRUCTIONS`. ``cfg.analyses.get("DF")`` computes the
+dominance frontier the first time, then returns the same result until
+a pass declares that it modifies the structure of the CFG, or until
+the :py:meth:`version <Lib.CFG.CFG.get_version>` of the CFG changes
+(which any modification of its blocks and edges does).
+
+Passes modifying the CFG are run with :py:meth:`AnalysisManager.run_pass`,
+which times them and invalidates the analyses depending on what
+they declare to modify, e.g.::
+
+    cfg.analyses.run_pass("optim_ssa", OptimSSA, debug, modifies=ALL)
+
+Some analyses can also be updated block by block (e.g. the def-use
+chains of :py:mod:`Lib.DefUse`), when the CFG reports changed blocks
+(see :py:meth:`Lib.CFG.CFG.block_changed`): passes keeping these
+reports accurate declare that they preserve them, and the manager
+checks that no block changed unreported before giving such a result.
+
+Results are shared: do not modify them.
+"""
+
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Tuple
+from Lib.CFG import Block, CFG
+from Lib.DefUse import DefUseIndex
+from Lib.Dominators import (
+    computeIdom, computeDom, computeDF, computeLoops, DominatorTree)
+from Lib.Errors import MiniCInternalError
+from Lib.Timing import time_pass
+
+#: The blocks of the CFG, their terminators and edges
+STRUCTURE = "structure"
+#: The statements in the blocks (including phi nodes)
+INSTRUCTIONS = "instructions"
+#: Everything
+ALL: FrozenSet[str] = frozenset({STRUCTURE, INSTRUCTIONS})
+
+# Registered analyses: name -> (function, parts of the CFG it depends on,
+# function updating a result for a changed block or None,
+# function checking an updated result or None)
+_ANALYSES: Dict[str, Tuple[Callable[['AnalysisManager'], Any], FrozenSet[str],
+                           Callable[[Any, Block], None] | None,
+                           Callable[[Any], None] | None]] = dict()
+
+
+def register_analysis(name: str, compute: Callable[['AnalysisManager'], Any],
+                      depends_on: Iterable[str],
+                      update: Callable[[Any, Block], None] | None = None,
+                      check: Callable[[Any], None] | None = None) -> None:
+    """
+    Register the analysis `name`. `compute` is given the manager of the
+    CFG (with the CFG in its `cfg` attribute, and the other analyses
+    through its :py:meth:`get <AnalysisManager.get>` method),
+    and returns the result of the analysis.
+    If given, `update(result, block)` updates a result after a change
+    of `block` (see :py:meth:`AnalysisManager.block_changed`), and
+    `check(result)` raises a MiniCInternalError if the CFG has changed
+    since without reporting it: the manager calls it before giving back
+    a cached result.
+    """
+    _ANALYSES[name] = (compute, frozenset(depends_on), update, check)
+
+
+class AnalysisManager:
+    """The cached analyses of a CFG."""
+
+    cfg: CFG
+    # Name -> version of the CFG when the result was computed, result
+    _results: Dict[str, Tuple[int, Any]]
+
+    def __init__(self, cfg: CFG):
+        self.cfg = cfg
+        self._results = dict()
+
+    def get(self, name: str) -> Any:
+        """Return the result of the analysis `name`, computed if needed."""
+        if self.is_cached(name):
+            result = self._results[name][1]
+            check = _ANALYSES[name][3]
+            if check is not None:
+                check(result)
+            return result
+        if name not in _ANALYSES:
+            raise MiniCInternalError("Unknown analysis: {}".format(name))
+        compute = _ANALYSES[name][0]
+        version = self.cfg.get_version()
+        result = compute(self)
+        self._results[name] = (version, result)
+        return result
+
+    def is_cached(self, name: str) -> bool:
+        """
+        Return True if the result of the analysis `name` is available:
+        it has been computed and not invalidated, and if it depends on
+        the structure of the CFG, the CFG has not been modified since
+        (unless the analysis is updated block by block).
+        """
+        cached = self._results.get(name)
+        if cached is None:
+            return False
+        _, depends_on, update, _ = _ANALYSES[name]
+        return (cached[0] == self.cfg.get_version()
+                or STRUCTURE not in depends_on or update is not None)
+
+    def invalidate(self, modifies: Iterable[str] = ALL,
+                   preserves: Iterable[str] = ()) -> None:
+        """
+        Forget the results of the analyses depending on the parts of
+        the CFG in `modifies` (see :py:data:`STRUCTURE`, :py:data:`INSTRUCTIONS`),
+        except the analyses named in `preserves`.
+        """
+        modified = frozenset(modifies)
+        for name in list(self._results):
+            if _ANALYSES[name][1] & modified and name not in preserves:
+                del self._results[name]
+
+    def block_changed(self, block: Block) -> None:
+        """
+        Update the results of the analyses that can be updated block by
+        block, after a change of `block` (see :py:meth:`Lib.CFG.CFG.block_changed`).
+        """
+        for name, (_, result) in self._results.items():
+            update = _ANALYSES[name][2]
+            if update is not None:
+                update(result, block)
+
+    def run_pass(self, name: str, function: Callable[..., Any], *args,
+                 modifies: Iterable[str] = ALL, preserves: Iterable[str] = ()) -> Any:
+        """
+        Run the pass `function(cfg, *args)`, timed as `name`, then
+        invalidate the analyses depending on `modifies`, except the
+        ones named in `preserves` (which the pass keeps up to date).
+        Return the result of the pass.
+        """
+        with time_pass(name):
+            result = function(self.cfg, *args)
+        self.invalidate(modifies, preserves)
+        return result
+
+
+def _dominance_frontier(manager: AnalysisManager) -> Any:
+    # computeDF does not use the sets of dominators.
+    return computeDF(manager.cfg, {}, manager.get("DT"), False, "")
+
+
+register_analysis("idom", lambda m: computeIdom(m.cfg), [STRUCTURE])
+register_analysis("dominator_tree", lambda m: DominatorTree(m.get("idom")), [STRUCTURE])
+register_analysis("dominators", lambda m: computeDom(m.cfg), [STRUCTURE])
+register_analysis("DT", lambda m: m.get("dominator_tree").to_DT(), [STRUCTURE])
+register_analysis("DF", _dominance_frontier, [STRUCTURE])
+register_analysis("loops", lambda m: computeLoops(m.cfg, m.get("dominator_tree")), [STRUCTURE])
+register_analysis("def_use", lambda m: DefUseIndex(m.cfg), ALL,
+                  DefUseIndex.update_block, DefUseIndex.check)
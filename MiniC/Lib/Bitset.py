@@ -0,0 +1,176 @@
+"""
+Dense sets of blocks or temporaries, for the dataflow analyses.
+
+A :py:class:`Numbering` gives consecutive numbers to objects, e.g. the
+blocks of a CFG (:py:meth:`Lib.CFG.CFG.get_block_numbering`) or the
+temporaries of a pool
+(:py:meth:`Lib.Operands.TemporaryPool.get_numbering`).
+A :py:class:`Bitset` is a set of numbered objects, stored as a Python
+integer whose bit i is set when the object numbered i is in the set:
+a set of 10000 temporaries takes 1.3kB (instead of about 500kB for a
+``set``), and unions and intersections are single integer operations.
+But the methods of bitsets are written in Python, and adding an element
+copies the integer: adding and testing elements one by one is 5 to 25
+times slower than with a ``set``, the more so as there are more objects
+(see benchmarks/bench_bitset.py).
+
+Bitsets are mutable sets (``add``, ``in``, ``|=``, iteration...), so
+they can be used where the analyses use sets. Iterating over a bitset
+gives its elements in increasing number.
+"""
+
+from collections.abc import MutableSet
+from typing import Any, Dict, Iterable, Iterator, List
+
+
+class Numbering:
+    """Consecutive numbers, from 0, for a growing collection of objects."""
+
+    _objects: List[Any]
+    _numbers: Dict[Any, int]
+
+    def __init__(self, objects: Iterable[Any] = ()):
+        self._objects = []
+        self._numbers = dict()
+        for x in objects:
+            self.number(x)
+
+    def number(self, x: Any) -> int:
+        """Return the number of `x`, giving it the next number if it has none."""
+        n = self._numbers.get(x)
+        if n is None:
+            n = self._numbers[x] = len(self._objects)
+            self._objects.append(x)
+        return n
+
+    def get(self, n: int) -> Any:
+        """Return the object numbered `n`."""
+        return self._objects[n]
+
+    def __contains__(self, x: Any) -> bool:
+        return x in self._numbers
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def empty_set(self) -> 'Bitset':
+        """Return a new empty set of objects of this numbering."""
+        return Bitset(self)
+
+
+class Bitset(MutableSet):
+    """A set of objects numbered by a :py:class:`Numbering`."""
+
+    __slots__ = ('_numbering', '_bits')
+
+    _numbering: Numbering
+    _bits: int
+
+    def __init__(self, numbering: Numbering, elements: Iterable[Any] = ()):
+        self._numbering = numbering
+        bits = 0
+        for x in elements:
+            bits |= 1 << numbering.number(x)
+        self._bits = bits
+
+    def _with_bits(self, bits: int) -> 'Bitset':
+        res = Bitset.__new__(Bitset)
+        res._numbering = self._numbering
+        res._bits = bits
+        return res
+
+    def _bits_of(self, other: Iterable[Any]) -> int:
+        """Return the bits of `other`, a Bitset of the same numbering or an iterable."""
+        if isinstance(other, Bitset) and other._numbering is self._numbering:
+            return other._bits
+        bits = 0
+        for x in other:
+            bits |= 1 << self._numbering.number(x)
+        return bits
+
+    @classmethod
+    def _from_iterable(cls, it):
+        # Used by the operators of MutableSet on other iterables:
+        # return a plain set, as the numbering is unknown.
+        return set(it)
+
+    def __contains__(self, x: Any) -> bool:
+        n = self._numbering._numbers.get(x)
+        return n is not None and (self._bits >> n) & 1 == 1
+
+    def __iter__(self) -> Iterator[Any]:
+        bits = self._bits
+        get = self._numbering._objects
+        while bits:
+            low = bits & -bits
+            yield get[low.bit_length() - 1]
+            bits ^= low
+
+    def __len__(self) -> int:
+        return self._bits.bit_count()
+
+    def __bool__(self) -> bool:
+        return self._bits != 0
+
+    def add(self, x: Any) -> None:
+        self._bits |= 1 << self._numbering.number(x)
+
+    def discard(self, x: Any) -> None:
+        n = self._numbering._numbers.get(x)
+        if n is not None:
+            self._bits &= ~(1 << n)
+
+    def clear(self) -> None:
+        self._bits = 0
+
+    def copy(self) -> 'Bitset':
+        return self._with_bits(self._bits)
+
+    def __or__(self, other):
+        return self._with_bits(self._bits | self._bits_of(other))
+
+    def __and__(self, other):
+        return self._with_bits(self._bits & self._bits_of(other))
+
+    def __sub__(self, other):
+        return self._with_bits(self._bits & ~self._bits_of(other))
+
+    def __xor__(self, other):
+        return self._with_bits(self._bits ^ self._bits_of(other))
+
+    def __ior__(self, other):
+        self._bits |= self._bits_of(other)
+        return self
+
+    def __iand__(self, other):
+        self._bits &= self._bits_of(other)
+        return self
+
+    def __isub__(self, other):
+        self._bits &= ~self._bits_of(other)
+        return self
+
+    def __ixor__(self, other):
+        self._bits ^= self._bits_of(other)
+        return self
+
+    union = __or__
+    intersection = __and__
+    difference = __sub__
+
+    def update(self, *others: Iterable[Any]) -> None:
+        for other in others:
+            self._bits |= self._bits_of(other)
+
+    def issubset(self, other: Iterable[Any]) -> bool:
+        return self._bits & ~self._bits_of(other) == 0
+
+    def __eq__(self, other):
+        if isinstance(other, Bitset) and other._numbering is self._numbering:
+            return self._bits == other._bits
+        return super().__eq__(other)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self):
+        return "Bitset({" + ", ".join(map(str, self)) + "})"
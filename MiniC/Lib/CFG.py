@@ -4,10 +4,11 @@ and :py:class:`Block` for its basic blocks.
 """
 
 from graphviz import Digraph  # for dot output
-from typing import cast, Any, Dict, List, Set, Iterator
+from typing import cast, Any, Dict, List, Set, Iterator, Tuple, TYPE_CHECKING
 
+from Lib.Bitset import Numbering
 from Lib.Errors import MiniCInternalError
-from Lib.Operands import (Operand, Immediate, Function, A0)
+from Lib.Operands import (Operand, Immediate, Function, Temporary, A0)
 from Lib.Statement import (
     Statement, Instru3A, Label,
     AbsoluteJump, ConditionalJump, Comment
@@ -16,6 +17,9 @@ from Lib.Terminator import (
     Terminator, BranchingTerminator, Return)
 from Lib.FunctionData import (FunctionData, _iter_statements, _print_code)
 
+if TYPE_CHECKING:
+    from Lib.Analyses import AnalysisManager
+
 
 BlockInstr = Instru3A | Comment
 
@@ -40,11 +44,13 @@ class Block:
     _in: List['Block']
     _gen: Set
     _kill: Set
+    _cfg: 'CFG | None'
 
     def __init__(self, label: Label, insts: List[BlockInstr], terminator: Terminator):
         self._label = label
         self._instructions = insts
         self._in = []
+        self._cfg = None  # The CFG the block was added to
         self._phis = []
         self._terminator = terminator
         self._gen = set()
@@ -107,6 +113,9 @@ class Block:
     def set_terminator(self, term: Terminator) -> None:
         """Set the terminator of the block."""
         self._terminator = term
+        if self._cfg is not None:
+            self._cfg.invalidate()
+            self._cfg.block_changed(self)
 
     def iter_statements(self, f) -> None:
         """Iterate over instructions.
@@ -130,6 +139,73 @@ class Block:
     def add_instruction(self, instr: BlockInstr) -> None:
         """Add an instruction to the body of the block."""
         self._instructions.append(instr)
+        if self._cfg is not None:
+            self._cfg.block_changed(self)
+
+
+class CFGOrders:
+    """
+    Depth-first orders of the blocks of a :py:class:`CFG`,
+    computed by :py:meth:`CFG.orders`.
+
+    The depth-first search starts from the start block and the blocks
+    without predecessors. It then starts again from the first block
+    (in the order of :py:meth:`CFG.get_blocks`) not reached yet, until
+    every block is reached.
+    """
+
+    #: The blocks reached from each of the roots of the search, in
+    #: reverse postorder: the first part has the blocks reachable
+    #: from the start block and the blocks without predecessors.
+    parts: List[List['Block']]
+    #: The concatenation of the parts. Each block comes after
+    #: its immediate dominator.
+    reverse_postorder: List['Block']
+    #: The reverse of reverse_postorder: successors come first,
+    #: except along back edges.
+    postorder: List['Block']
+    #: The blocks in the order they are reached
+    preorder: List['Block']
+    #: Parent of each block in the depth-first tree, None for the roots
+    dfs_parent: Dict['Block', 'Block | None']
+    #: Index of each block in preorder ("DFS number")
+    preorder_number: Dict['Block', int]
+    #: Index of each block in reverse_postorder
+    rpo_number: Dict['Block', int]
+
+    def __init__(self, cfg: 'CFG'):
+        self.parts = []
+        self.preorder = []
+        self.dfs_parent = dict()
+        start = cfg.get_block(cfg.get_start())
+        first_roots = [start] + [b for b in cfg.get_entries() if b is not start]
+        for roots in [first_roots] + [[b] for b in cfg.get_blocks()]:
+            postorder: List[Block] = []
+            for root in roots:
+                if root in self.dfs_parent:
+                    continue
+                self.dfs_parent[root] = None
+                self.preorder.append(root)
+                # Explicit stack of (block, iterator over its successors)
+                stack = [(root, iter(cfg.out_blocks(root)))]
+                while stack:
+                    b, succs = stack[-1]
+                    for succ in succs:
+                        if succ not in self.dfs_parent:
+                            self.dfs_parent[succ] = b
+                            self.preorder.append(succ)
+                            stack.append((succ, iter(cfg.out_blocks(succ))))
+                            break
+                    else:
+                        stack.pop()
+                        postorder.append(b)
+            if postorder:
+                postorder.reverse()
+                self.parts.append(postorder)
+        self.reverse_postorder = [b for part in self.parts for b in part]
+        self.postorder = self.reverse_postorder[::-1]
+        self.preorder_number = {b: i for i, b in enumerate(self.preorder)}
+        self.rpo_number = {b: i for i, b in enumerate(self.reverse_postorder)}
 
 
 class CFG:
@@ -141,17 +217,35 @@ class CFG:
 
     As with linear code, metadata about the function can be found
     in the :py:attr:`fdata` member variable.
+
+    The successors of the blocks, the blocks without predecessors and
+    the :py:meth:`depth-first orders <orders>` are computed when needed
+    and kept until the CFG is modified, i.e. until its
+    :py:meth:`version <get_version>` changes.
     """
 
     _start: Label
     _end: Label
     _blocks: Dict[Label, Block]
+    _block_numbering: Numbering
+    _version: int
+    # Version at which the cached values were computed, and the values
+    _succs: Dict[Block, Tuple[int, List[Block]]]
+    _entries: Tuple[int, List[Block]] | None
+    _orders: Tuple[int, CFGOrders] | None
+    _analyses: 'AnalysisManager | None'
 
     #: Metadata about the function represented by this CFG
     fdata: FunctionData
 
     def __init__(self, fdata: FunctionData):
         self._blocks = {}
+        self._block_numbering = Numbering()
+        self._version = 0
+        self._succs = dict()
+        self._entries = None
+        self._orders = None
+        self._analyses = None
         self.fdata = fdata
         self._init_blks()
         self._end = self.fdata.fresh_label("end")
@@ -169,6 +263,17 @@ class CFG:
         ], terminator=Return())
         self.add_block(blk)
 
+    @property
+    def analyses(self) -> 'AnalysisManager':
+        """
+        The :py:class:`analysis manager <Lib.Analyses.AnalysisManager>`
+        of the CFG, caching its analyses.
+        """
+        if self._analyses is None:
+            from Lib.Analyses import AnalysisManager
+            self._analyses = AnalysisManager(self)
+        return self._analyses
+
     def get_start(self) -> Label:
         """Return the entry label of the CFG."""
         return self._start
@@ -177,6 +282,7 @@ class CFG:
         """Set the entry label of the CFG."""
         assert (start in self._blocks)
         self._start = start
+        self.invalidate()
 
     def get_end(self) -> Label:
         """Return the exit label of the CFG."""
@@ -185,6 +291,60 @@ class CFG:
     def add_block(self, blk: Block) -> None:
         """Add a new block to the CFG."""
         self._blocks[blk._label] = blk
+        self._block_numbering.number(blk)
+        blk._cfg = self
+        self.invalidate()
+        self.block_changed(blk)
+
+    def remove_block(self, blk: Block) -> None:
+        """
+        Remove a block from the CFG, with the edges going out of it.
+        No other block may have an edge to it.
+        """
+        if any(pred is not blk for pred in blk.get_in()):
+            raise MiniCInternalError(
+                "remove_block: block {} still has predecessors {}"
+                .format(blk.get_label(), blk.get_in()))
+        for succ in self.out_blocks(blk):
+            while blk in succ.get_in():
+                succ.get_in().remove(blk)
+        del self._blocks[blk.get_label()]
+        self._succs.pop(blk, None)
+        blk._cfg = None
+        self.invalidate()
+        self.block_changed(blk)
+
+    def invalidate(self) -> None:
+        """
+        Record that the CFG has been modified, so that the cached
+        successors and orders are computed again.
+        The methods modifying the CFG and :py:meth:`Block.set_terminator`
+        call it: call it after modifying the blocks by other means.
+        """
+        self._version += 1
+
+    def block_changed(self, blk: Block) -> None:
+        """
+        Record that the statements of `blk` have changed, or that it has
+        been added or removed, for the analyses updated block by block
+        (see :py:meth:`Lib.Analyses.AnalysisManager.block_changed`).
+        Adding and removing blocks, :py:meth:`Block.set_terminator`
+        and :py:meth:`Block.add_instruction` call it: call it after
+        modifying the statements of a block by other means.
+        """
+        if self._analyses is not None:
+            self._analyses.block_changed(blk)
+
+    def get_version(self) -> int:
+        """Return a number that changes each time the CFG is modified."""
+        return self._version
+
+    def get_block_numbering(self) -> Numbering:
+        """
+        Return the numbering of the blocks of the CFG,
+        for :py:class:`bitsets <Lib.Bitset.Bitset>` of blocks.
+        """
+        return self._block_numbering
 
     def get_block(self, name: Label) -> Block:
         """Return the block with label `name`."""
@@ -196,24 +356,46 @@ class CFG:
 
     def get_entries(self) -> List[Block]:
         """Return all the blocks with no predecessors."""
-        return [b for b in self._blocks.values() if not b.get_in()]
+        if self._entries is None or self._entries[0] != self._version:
+            self._entries = (self._version,
+                             [b for b in self._blocks.values() if not b.get_in()])
+        return list(self._entries[1])
 
     def add_edge(self, src: Block, dest: Block) -> None:
         """Add the edge src -> dest in the control flow graph."""
         dest.get_in().append(src)
+        self.invalidate()
         # assert (dest.get_label() in src.get_terminator().targets())
 
     def remove_edge(self, src: Block, dest: Block) -> None:
         """Remove the edge src -> dest in the control flow graph."""
         dest.get_in().remove(src)
+        self.invalidate()
         # assert (dest.get_label() not in src.get_terminator().targets())
 
     def out_blocks(self, block: Block) -> List[Block]:
         """
         Return the list of blocks in the CFG targeted by
         the Terminator of Block block.
+        The list is shared until the CFG is modified: do not modify it.
+        After modifying a terminator in place, call
+        :py:meth:`Block.set_terminator` again (see :py:mod:`Lib.Terminator`).
+        """
+        cached = self._succs.get(block)
+        if cached is None or cached[0] != self._version:
+            cached = self._succs[block] = (
+                self._version,
+                [self.get_block(dest) for dest in block.get_terminator().targets()])
+        return cached[1]
+
+    def orders(self) -> CFGOrders:
+        """
+        Return the depth-first orders of the blocks (see :py:class:`CFGOrders`).
+        They are shared until the CFG is modified: do not modify them.
         """
-        return [self.get_block(dest) for dest in block.get_terminator().targets()]
+        if self._orders is None or self._orders[0] != self._version:
+            self._orders = (self._version, CFGOrders(self))
+        return self._orders[1]
 
     def gather_defs(self) -> Dict[Any, Set[Block]]:
         """
@@ -230,6 +412,27 @@ class CFG:
                         defs[v].add(b)
         return defs
 
+    def gather_uses(self) -> Dict[Temporary, Set[Tuple[Block, int | None, Statement]]]:
+        """
+        Return a dictionary giving for each temporary the set of statements using it,
+        with additionally for each statement, the block of the statement and its position
+        inside. Phi nodes have position None in their block, while a Terminator is at
+        the last position of its block.
+        """
+        uses: Dict[Temporary, Set[Tuple[Block, int | None, Statement]]] = dict()
+        for block in self.get_blocks():
+            # Look inside the phi nodes
+            for phi in block._phis:
+                for var in phi.used().values():  # type: ignore[attr-defined]
+                    if isinstance(var, Temporary):
+                        uses.setdefault(var, set()).add((block, None, phi))
+            # Look inside the body and the terminator
+            for pos, instr in enumerate(block.get_body_and_terminator()):
+                for var in instr.used():
+                    if isinstance(var, Temporary):
+                        uses.setdefault(var, set()).add((block, pos, instr))
+        return uses
+
     def iter_statements(self, f) -> None:
         """Apply f to all instructions in all the blocks."""
         for b in self.get_blocks():
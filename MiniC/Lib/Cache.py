@@ -0,0 +1,98 @@
+"""
+On-disk cache of compilation results (generated code and syntax trees),
+used by the ``--cache-dir`` option of ``MiniCC.py``.
+
+Entries are content-addressed: the key of an entry is a hash of the
+source file, of the compilation options, and of a fingerprint of the
+compiler itself (the Python sources it is made of), so that modifying
+the compiler invalidates all the entries.
+Entries are written atomically, so several compilers can share
+the same cache directory.
+
+Syntax trees are stored with :py:func:`Lib.AST.dump_ast`.
+"""
+
+import glob
+import hashlib
+import os
+import tempfile
+from functools import lru_cache
+
+# Root directory of the compiler (where MiniCC.py lives)
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@lru_cache(maxsize=None)
+def compiler_fingerprint() -> str:
+    """Return a hash of the sources of the compiler."""
+    h = hashlib.sha256()
+    files = [os.path.join(_ROOT, f)
+             for f in ("MiniCC.py", "MiniCLexer.py", "MiniCParser.py", "MiniCVisitor.py")]
+    files += sorted(glob.glob(os.path.join(_ROOT, "Lib", "*.py")))
+    files += sorted(glob.glob(os.path.join(_ROOT, "TP*", "*.py")))
+    for filename in files:
+        try:
+            with open(filename, 'rb') as f:
+                content = f.read()
+        except OSError:
+            continue
+        h.update(os.path.relpath(filename, _ROOT).encode())
+        h.update(b"\0")
+        h.update(hashlib.sha256(content).digest())
+    return h.hexdigest()
+
+
+class CompileCache:
+    """A cache of compilation results stored in a directory."""
+
+    _directory: str
+    _suffix: str
+
+    def __init__(self, directory: str, suffix: str = ".s"):
+        self._directory = directory
+        self._suffix = suffix
+
+    def key(self, source: bytes, *options) -> str:
+        """Return the key for compiling `source` with the given options."""
+        h = hashlib.sha256()
+        h.update(compiler_fingerprint().encode())
+        for opt in options:
+            h.update(b"\0")
+            h.update(str(opt).encode())
+        h.update(b"\0")
+        h.update(source)
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, key[:2], key[2:] + self._suffix)
+
+    def get_bytes(self, key: str) -> bytes | None:
+        """Return the content cached for `key`, or None on a miss."""
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put_bytes(self, key: str, content: bytes) -> None:
+        """Store `content` for `key`, atomically."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def get(self, key: str) -> str | None:
+        """Return the text cached for `key`, or None on a miss."""
+        content = self.get_bytes(key)
+        return None if content is None else content.decode('utf-8')
+
+    def put(self, key: str, content: str) -> None:
+        """Store the text `content` for `key`, atomically."""
+        self.put_bytes(key, content.encode('utf-8'))
+
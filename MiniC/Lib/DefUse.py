@@ -0,0 +1,171 @@
+"""
+Def-use chains of the temporaries of a :py:class:`CFG <Lib.CFG.CFG>`.
+
+The :py:class:`DefUseIndex` of a CFG gives, for each variable, its
+definitions and, for each temporary, its uses, as sites
+``(block, position, statement)``: the position of a phi node is None,
+and the terminator is at the last position of its block, as in
+:py:meth:`Lib.CFG.CFG.gather_uses`.
+Under SSA form, each temporary has one definition.
+
+It is the ``"def_use"`` analysis of the
+:py:class:`analysis manager <Lib.Analyses.AnalysisManager>` of the CFG,
+built once after entering SSA form and then updated block by block:
+the CFG reports the blocks added or removed and the terminators
+replaced, and passes modifying the statements of a block otherwise
+(e.g. by assigning ``block._instructions``) call :py:meth:`CFG.block_changed
+<Lib.CFG.CFG.block_changed>`. The reported blocks are indexed again
+when the index is next queried, once however many times they changed.
+The manager :py:meth:`checks <DefUseIndex.check>` before giving the
+index that no block has changed without being reported (statements
+modified in place, e.g. the operands of a phi node, are not noticed).
+"""
+
+from typing import Dict, List, Set, Tuple
+from Lib.CFG import Block, CFG
+from Lib.Errors import MiniCInternalError
+from Lib.Operands import Operand, Temporary
+from Lib.Statement import Statement
+
+#: A definition or use of a temporary: block, position, statement
+Site = Tuple[Block, int | None, Statement]
+
+
+def _snapshot(block: Block) -> Tuple[int, ...]:
+    """The identities of the statements of `block`, and of their lists."""
+    return (id(block._phis), id(block._instructions), id(block._terminator),
+            *map(id, block._phis), *map(id, block._instructions))
+
+
+class DefUseIndex:
+    """Definitions and uses of the variables of a CFG."""
+
+    _cfg: CFG
+    _defs: Dict[Operand, List[Site]]
+    _uses: Dict[Temporary, List[Site]]
+    # Variables with a site in each block
+    _block_vars: Dict[Block, Set[Operand]]
+    # Statements of each block when it was indexed (see _snapshot)
+    _snapshots: Dict[Block, Tuple[int, ...]]
+    # Blocks to index again before the next query (an ordered set)
+    _dirty: Dict[Block, None]
+
+    def __init__(self, cfg: CFG):
+        self._cfg = cfg
+        self._defs = dict()
+        self._uses = dict()
+        self._block_vars = dict()
+        self._snapshots = dict()
+        self._dirty = dict()
+        for block in cfg.get_blocks():
+            self._add_block(block)
+
+    def _add_block(self, block: Block) -> None:
+        variables: Set[Operand] = set()
+        sites: List[Tuple[int | None, Statement]] = [(None, phi) for phi in block._phis]
+        sites.extend(enumerate(block.get_body_and_terminator()))
+        for pos, stat in sites:
+            used = stat.used()
+            if isinstance(used, dict):  # Phi node: label -> operand
+                used = list(used.values())
+            for var in stat.defined():
+                self._defs.setdefault(var, []).append((block, pos, stat))
+                variables.add(var)
+            # A statement using a temporary twice is one use site
+            for var in dict.fromkeys(used):
+                if isinstance(var, Temporary):
+                    self._uses.setdefault(var, []).append((block, pos, stat))
+                    variables.add(var)
+        self._block_vars[block] = variables
+        self._snapshots[block] = _snapshot(block)
+
+    def _remove_block(self, block: Block) -> None:
+        """Forget the sites of `block`."""
+        tables: List[Dict] = [self._defs, self._uses]
+        self._snapshots.pop(block, None)
+        for var in self._block_vars.pop(block, ()):
+            for table in tables:
+                sites = table.get(var)
+                if sites is None:
+                    continue
+                sites = [site for site in sites if site[0] is not block]
+                if sites:
+                    table[var] = sites
+                else:
+                    del table[var]
+
+    def update_block(self, block: Block) -> None:
+        """
+        Record that the statements of `block` have changed, or that it
+        has been added to or removed from the CFG.
+        """
+        self._dirty[block] = None
+
+    def _refresh(self) -> None:
+        """Index again the blocks that have changed."""
+        dirty, self._dirty = self._dirty, dict()
+        for block in dirty:
+            self._remove_block(block)
+            if block._cfg is self._cfg:
+                self._add_block(block)
+
+    def check(self) -> None:
+        """
+        Raise a MiniCInternalError if blocks have been added, removed or
+        given other statements without being reported to the CFG.
+        """
+        self._refresh()
+        blocks = self._cfg.get_blocks()
+        stale = [block for block in blocks
+                 if self._snapshots.get(block) != _snapshot(block)]
+        if stale or len(blocks) != len(self._snapshots):
+            stale += [block for block in self._snapshots if block._cfg is not self._cfg]
+            raise MiniCInternalError(
+                "Def-use index out of date, call CFG.block_changed for: {}"
+                .format(", ".join(str(block.get_label()) for block in stale)))
+
+    def variables(self) -> List[Operand]:
+        """Return the variables (temporaries and registers) defined in the CFG."""
+        self._refresh()
+        return list(self._defs)
+
+    def temporaries(self) -> List[Temporary]:
+        """Return the temporaries defined or used in the CFG."""
+        self._refresh()
+        return [var for var in self._defs if isinstance(var, Temporary)] + [
+            var for var in self._uses if var not in self._defs]
+
+    def def_sites(self, var: Operand) -> List[Site]:
+        """Return the definitions of `var`."""
+        self._refresh()
+        return self._defs.get(var, [])
+
+    def def_site(self, var: Operand) -> Site | None:
+        """
+        Return the definition of `var` under SSA form (the first one
+        otherwise), None if it is not defined in the CFG.
+        """
+        self._refresh()
+        sites = self._defs.get(var)
+        return sites[0] if sites else None
+
+    def use_sites(self, var: Temporary) -> List[Site]:
+        """Return the uses of `var`."""
+        self._refresh()
+        return self._uses.get(var, [])
+
+    def def_blocks(self) -> Dict[Operand, Set[Block]]:
+        """
+        Return a dictionary associating the variables to the blocks
+        containing their definitions, like :py:meth:`Lib.CFG.CFG.gather_defs`.
+        """
+        self._refresh()
+        return {var: {block for block, _, _ in sites} for var, sites in self._defs.items()}
+
+    def uses(self) -> Dict[Temporary, Set[Site]]:
+        """
+        Return a dictionary associating the temporaries to their uses,
+        like :py:meth:`Lib.CFG.CFG.gather_uses`.
+        """
+        self._refresh()
+        return {var: set(sites) for var, sites in self._uses.items()}
@@ -5,42 +5,381 @@ Do not hesitate to look at the source of the functions
 to get a better understanding of the algorithms.
 """
 
-from typing import Dict, Set
+from typing import AbstractSet, Dict, List, Set
 from graphviz import Digraph
+from Lib.Bitset import Bitset
 from Lib.CFG import Block, CFG
+from Lib.Timing import timed
 
 
-def computeDom(cfg: CFG) -> Dict[Block, Set[Block]]:
+def reverse_postorder(cfg: CFG) -> List[Block]:
+    """
+    Return the blocks of `cfg` in reverse postorder of a depth-first
+    search from the start block and the blocks without predecessors
+    (then from the blocks not reachable from them, if any).
+    Each block comes after its immediate dominator.
+    See :py:meth:`CFG.orders <Lib.CFG.CFG.orders>`.
+    """
+    return list(cfg.orders().reverse_postorder)
+
+
+@timed("computeIdom")
+def computeIdom(cfg: CFG, algorithm: str = 'semi-nca') -> Dict[Block, Block | None]:
+    """
+    `computeIdom(cfg)` computes the table associating blocks to their
+    immediate dominator in `cfg`, or None for the start block and the
+    blocks without predecessors. Each block comes after its immediate
+    dominator in the table.
+
+    Blocks that are not reachable from these roots are handled as if
+    the first of them was a root, and so on; edges coming from the blocks
+    handled later are ignored.
+
+    `algorithm` is 'semi-nca' (see :py:func:`_idom_semi_nca`), the default
+    (benchmarks/bench_dominators.py finds it faster than CHK on small CFGs,
+    and as fast on large ones), or 'chk' (see :py:func:`_idom_chk`).
+    """
+    if algorithm == 'chk':
+        return _idom_chk(cfg)
+    elif algorithm == 'semi-nca':
+        return _idom_semi_nca(cfg)
+    raise ValueError("Unknown dominator algorithm: " + algorithm)
+
+
+def _idom_chk(cfg: CFG) -> Dict[Block, Block | None]:
+    """
+    Compute the immediate dominators with the algorithm of Cooper, Harvey
+    and Kennedy ("A Simple, Fast Dominance Algorithm"): blocks are numbered
+    in reverse postorder, and the immediate dominator of a block is the
+    nearest common ancestor, in the dominator tree computed so far,
+    of its already processed predecessors. This is iterated until
+    nothing changes, which takes very few iterations on structured code.
+    """
+    parts = cfg.orders().parts
+    order = cfg.orders().reverse_postorder
+    # Blocks are numbered from 1 in reverse postorder; 0 is a virtual root,
+    # parent of all the roots.
+    number: Dict[Block, int] = {b: i + 1 for i, b in enumerate(order)}
+    idom: List[int] = [-1] * (len(order) + 1)
+    idom[0] = 0
+    # Predecessors of each block, ignoring the ones from the parts
+    # processed after the part of the block.
+    preds: List[List[int]] = [[]]
+    for part in parts:
+        last = number[part[-1]]
+        for b in part:
+            preds.append([number[p] for p in b.get_in() if number[p] <= last])
+        # The first block of each part is a root
+        idom[number[part[0]]] = 0
+    for b in [cfg.get_block(cfg.get_start())] + cfg.get_entries():
+        idom[number[b]] = 0
+    is_root = [i > 0 and d == 0 for i, d in enumerate(idom)]
+
+    def intersect(b1: int, b2: int) -> int:
+        # Walk up from the deepest block (the one with the highest number)
+        while b1 != b2:
+            while b1 > b2:
+                b1 = idom[b1]
+            while b2 > b1:
+                b2 = idom[b2]
+        return b1
+
+    changed = True
+    while changed:
+        changed = False
+        for b in range(1, len(order) + 1):
+            if is_root[b]:
+                continue
+            new_idom = -1
+            for p in preds[b]:
+                if idom[p] == -1:  # Not processed yet
+                    continue
+                new_idom = p if new_idom == -1 else intersect(p, new_idom)
+            if idom[b] != new_idom:
+                idom[b] = new_idom
+                changed = True
+    return {b: order[idom[i] - 1] if idom[i] > 0 else None
+            for i, b in enumerate(order, 1)}
+
+
+def _idom_semi_nca(cfg: CFG) -> Dict[Block, Block | None]:
+    """
+    Compute the immediate dominators with the semi-NCA algorithm
+    (Georgiadis, "Linear-Time Algorithms for Dominators and Related
+    Problems"), a simpler variant of Lengauer-Tarjan.
+    Blocks are numbered in depth-first preorder. The semidominators are
+    computed in reverse preorder as in Lengauer-Tarjan, with a forest
+    compressed along the paths it evaluates. Then the immediate dominator
+    of each block is the nearest ancestor, in the dominator tree computed
+    so far, of its parent in the depth-first tree whose number is at most
+    the one of its semidominator. This runs in O(n log n).
+    """
+    # Preorder numbering from 1; 0 is a virtual root, parent of all the roots.
+    orders = cfg.orders()
+    order = orders.preorder
+    number: Dict[Block, int] = {b: i + 1 for i, b in enumerate(order)}
+    parent: List[int] = [0]
+    for b in order:
+        dfs_parent = orders.dfs_parent[b]
+        assert dfs_parent is None or dfs_parent in number
+        parent.append(0 if dfs_parent is None else number[dfs_parent])
+    # Last number of the part of each block (the blocks of each part
+    # of the orders are numbered consecutively)
+    part_end: List[int] = [0]
+    for part in orders.parts:
+        part_end.extend([len(part_end) + len(part) - 1] * len(part))
+    n = len(order) + 1
+    semi = list(range(n))
+    label = list(range(n))
+    ancestor = [-1] * n  # Links of the forest, -1 for the roots of the forest
+
+    def evaluate(v: int) -> int:
+        """Return the block of minimal semi on the forest path from v."""
+        if ancestor[v] == -1:
+            return v
+        # Compress the path from v, from its top down.
+        path = []
+        u = v
+        while ancestor[ancestor[u]] != -1:
+            path.append(u)
+            u = ancestor[u]
+        while path:
+            u = path.pop()
+            a = ancestor[u]
+            if semi[label[a]] < semi[label[u]]:
+                label[u] = label[a]
+            ancestor[u] = ancestor[a]
+        return label[v]
+
+    for w in range(n - 1, 0, -1):
+        if parent[w] == 0:
+            # A root: its semidominator is the virtual root
+            semi[w] = 0
+            ancestor[w] = 0
+            continue
+        for p in order[w - 1].get_in():
+            v = number[p]
+            if v > part_end[w]:  # Edge from a part handled later
+                continue
+            u = evaluate(v)
+            if semi[u] < semi[w]:
+                semi[w] = semi[u]
+        ancestor[w] = parent[w]
+    idom = [0] * n
+    for w in range(1, n):
+        d = parent[w]
+        while d > semi[w]:
+            d = idom[d]
+        idom[w] = d
+    return {b: order[idom[i] - 1] if idom[i] > 0 else None
+            for i, b in enumerate(order, 1)}
+
+
+@timed("computeDom")
+def computeDom(cfg: CFG, algorithm: str = 'semi-nca',
+               bitsets: bool = False) -> Dict[Block, AbstractSet[Block]]:
     """
     `computeDom(cfg)` computes the table associating blocks to their
     dominators in `cfg`.
-    It works by solving the equation system.
+    It works by computing the immediate dominators
+    (see :py:func:`computeIdom` for `algorithm`),
+    then following them up to the roots.
+    The sets take O(n^2) memory on deep dominator trees: to test
+    dominance, prefer :py:func:`computeDominatorTree`.
+    With `bitsets`, the sets are :py:class:`bitsets <Lib.Bitset.Bitset>`
+    numbered by :py:meth:`cfg.get_block_numbering() <Lib.CFG.CFG.get_block_numbering>`,
+    which are much smaller.
 
     This is an helper function called during SSA entry.
     """
-    all_blocks: Set[Block] = set(cfg.get_blocks())
-    dominators: Dict[Block, Set[Block]] = dict()
-    for b in all_blocks:
-        if b.get_in():  # If b has some predecessor
-            dominators[b] = all_blocks
-        else:  # If b has no predecessors
-            dominators[b] = {b}
-    new_dominators: Dict[Block, Set[Block]] = dict()
-    while True:
-        for b in all_blocks:
-            if b.get_in():
-                dom_preds = [dominators[b2] for b2 in b.get_in()]
-                new_dominators[b] = {b}.union(set.intersection(*dom_preds))
-            else:
-                new_dominators[b] = {b}
-        if dominators == new_dominators:
-            break
-        else:
-            dominators = new_dominators
-            new_dominators = dict()
+    idom = computeIdom(cfg, algorithm)
+    dominators: Dict[Block, AbstractSet[Block]] = dict()
+    if bitsets:
+        numbering = cfg.get_block_numbering()
+        for b, d in idom.items():
+            singleton = Bitset(numbering, (b,))
+            dominators[b] = singleton if d is None else dominators[d] | singleton
+        return dominators
+    # The immediate dominator of a block is before it in idom.
+    for b, d in idom.items():
+        dominators[b] = {b} if d is None else dominators[d] | {b}
     return dominators
 
 
+class DominatorTree:
+    """
+    The dominator tree of a CFG, indexed for dominance queries.
+
+    The blocks are numbered when entering and leaving them in a
+    depth-first traversal of the tree, so that `a` dominates `b` if and
+    only if the interval of `b` is included in the one of `a`:
+    :py:meth:`dominates` takes two comparisons, and the index takes O(n)
+    memory instead of the O(n^2) of the sets of :py:func:`computeDom`.
+
+    Build it with :py:func:`computeDominatorTree`.
+    """
+
+    _idom: Dict[Block, Block | None]
+    _children: Dict[Block, List[Block]]
+    _pre: Dict[Block, int]
+    _post: Dict[Block, int]
+    _depth: Dict[Block, int]
+
+    def __init__(self, idom: Dict[Block, Block | None]):
+        """
+        Build the tree from the immediate dominators `idom`
+        (see :py:func:`computeIdom`), in which each block comes after
+        its immediate dominator.
+        """
+        self._idom = idom
+        self._children = {b: [] for b in idom}
+        self._depth = dict()
+        roots: List[Block] = []
+        for b, d in idom.items():
+            if d is None:
+                roots.append(b)
+                self._depth[b] = 0
+            else:
+                self._children[d].append(b)
+                self._depth[b] = self._depth[d] + 1
+        self._roots = roots
+        self._pre = dict()
+        self._post = dict()
+        clock = 0
+        for root in roots:
+            # Explicit stack of (block, iterator over its children)
+            self._pre[root] = clock
+            clock += 1
+            stack = [(root, iter(self._children[root]))]
+            while stack:
+                b, children = stack[-1]
+                for child in children:
+                    self._pre[child] = clock
+                    clock += 1
+                    stack.append((child, iter(self._children[child])))
+                    break
+                else:
+                    stack.pop()
+                    self._post[b] = clock
+                    clock += 1
+
+    def dominates(self, a: Block, b: Block) -> bool:
+        """Return True if `a` dominates `b` (every block dominates itself)."""
+        return self._pre[a] <= self._pre[b] and self._post[b] <= self._post[a]
+
+    def strictly_dominates(self, a: Block, b: Block) -> bool:
+        """Return True if `a` dominates `b` and is not `b`."""
+        return a is not b and self.dominates(a, b)
+
+    def idom(self, b: Block) -> Block | None:
+        """Return the immediate dominator of `b`, None for the roots."""
+        return self._idom[b]
+
+    def children(self, b: Block) -> List[Block]:
+        """Return the blocks whose immediate dominator is `b`."""
+        return self._children[b]
+
+    def depth(self, b: Block) -> int:
+        """Return the depth of `b` in the tree, 0 for the roots."""
+        return self._depth[b]
+
+    def roots(self) -> List[Block]:
+        """Return the start block, the blocks without predecessors and the
+        first blocks of the unreachable parts of the CFG."""
+        return self._roots
+
+    def to_DT(self) -> Dict[Block, Set[Block]]:
+        """Return the tree in the format of :py:func:`computeDT`."""
+        return {b: set(children) for b, children in self._children.items()}
+
+
+@timed("computeDominatorTree")
+def computeDominatorTree(cfg: CFG, algorithm: str = 'semi-nca') -> DominatorTree:
+    """
+    `computeDominatorTree(cfg)` computes the dominator tree of `cfg`,
+    from its immediate dominators (see :py:func:`computeIdom` for
+    `algorithm`).
+    """
+    return DominatorTree(computeIdom(cfg, algorithm))
+
+
+class Loop:
+    """
+    A natural loop of a CFG: the blocks of the cycles going through
+    the back edges to its header (edges b -> header where header
+    dominates b). Loops with the same header are merged.
+    """
+
+    #: The block dominating all the blocks of the loop
+    header: Block
+    #: The blocks of the loop, header included
+    blocks: Set[Block]
+    #: The innermost loop containing this one, None for outermost loops
+    parent: 'Loop | None'
+    #: The loops whose parent is this one
+    children: List['Loop']
+
+    def __init__(self, header: Block, blocks: Set[Block]):
+        self.header = header
+        self.blocks = blocks
+        self.parent = None
+        self.children = []
+
+    def depth(self) -> int:
+        """Return the nesting depth of the loop, 1 for outermost loops."""
+        depth = 1
+        loop = self.parent
+        while loop is not None:
+            depth += 1
+            loop = loop.parent
+        return depth
+
+    def __repr__(self):
+        return "Loop({}, {} blocks)".format(self.header.get_label(), len(self.blocks))
+
+
+@timed("computeLoops")
+def computeLoops(cfg: CFG, tree: DominatorTree | None = None) -> List[Loop]:
+    """
+    `computeLoops(cfg)` computes the loop nest of `cfg`: its natural
+    loops, each loop before the loops it contains. `tree` is the
+    dominator tree of `cfg`, computed if not given.
+    """
+    if tree is None:
+        tree = computeDominatorTree(cfg)
+    # Sources of the back edges, by header
+    back_edges: Dict[Block, List[Block]] = dict()
+    for b in cfg.orders().reverse_postorder:
+        for succ in cfg.out_blocks(b):
+            if tree.dominates(succ, b):
+                back_edges.setdefault(succ, []).append(b)
+    loops: List[Loop] = []
+    for header, sources in back_edges.items():
+        # The blocks reaching a source of a back edge without going
+        # through the header (ignoring edges from unreachable blocks,
+        # which the header does not dominate).
+        blocks = {header}
+        todo = [b for b in sources if b is not header]
+        while todo:
+            b = todo.pop()
+            if b not in blocks and tree.dominates(header, b):
+                blocks.add(b)
+                todo.extend(b.get_in())
+        loops.append(Loop(header, blocks))
+    # Two natural loops are disjoint or nested: from the largest loop
+    # to the smallest, the parent of a loop is the last one seen that
+    # contains its header.
+    loops.sort(key=lambda loop: -len(loop.blocks))
+    innermost: Dict[Block, Loop] = dict()
+    for loop in loops:
+        loop.parent = innermost.get(loop.header)
+        if loop.parent is not None:
+            loop.parent.children.append(loop)
+        for b in loop.blocks:
+            innermost[b] = loop
+    return loops
+
+
 def printDT(filename: str, graph: Dict[Block, Set[Block]]) -> None:  # pragma: no cover
     """Display a graphical rendering of the given domination tree."""
     dot = Digraph()
@@ -52,7 +391,8 @@ def printDT(filename: str, graph: Dict[Block, Set[Block]]) -> None:  # pragma: n
     dot.render(filename, view=True)
 
 
-def computeDT(cfg: CFG, dominators: Dict[Block, Set[Block]],
+@timed("computeDT")
+def computeDT(cfg: CFG, dominators: Dict[Block, AbstractSet[Block]],
               dom_graphs: bool, basename: str) -> Dict[Block, Set[Block]]:
     """
     `computeDT(cfg, dominators)` computes the domination tree of `cfg`
@@ -65,16 +405,12 @@ def computeDT(cfg: CFG, dominators: Dict[Block, Set[Block]],
     # First, compute the immediate dominators
     idominators: Dict[Block, Block] = {}
     for b, doms in dominators.items():
-        # The immediate dominator of b is the unique vertex n ≠ b
-        # which dominates b and is dominated by all vertices in Dom(b) − b.
-        strict_doms = doms - {b}
-        idoms = set()
-        for n in strict_doms:
-            if strict_doms.issubset(dominators[n]):
-                idoms.add(n)
-        if idoms:
-            assert (len(idoms) == 1)
-            idominators[b] = idoms.pop()
+        # The immediate dominator of b is the strict dominator of b
+        # dominated by all the others, i.e. the one with most dominators.
+        idom = max((n for n in doms if n is not b),
+                   key=lambda n: len(dominators[n]), default=None)
+        if idom is not None:
+            idominators[b] = idom
     # Then, simply inverse the relation to obtain the domination tree
     DT = {b: set() for b in cfg.get_blocks()}
     for i, idominator in idominators.items():
@@ -87,39 +423,33 @@ def computeDT(cfg: CFG, dominators: Dict[Block, Set[Block]],
     return DT
 
 
-def _computeDF_at_block(
-        cfg: CFG,
-        dominators: Dict[Block, Set[Block]],
-        DT: Dict[Block, Set[Block]],
-        b: Block,
-        DF: Dict[Block, Set[Block]]) -> None:
-    """
-    `_computeDF_at_block(...)` computes the dominance frontier at the given block,
-    by updating `DF`.
-
-    This is an helper function called during SSA entry.
-    """
-    S: Set[Block] = {succ for succ in cfg.out_blocks(b) if succ not in DT[b]}
-    for b_succ in DT[b]:
-        _computeDF_at_block(cfg, dominators, DT, b_succ, DF)
-        for b_frontier in DF[b_succ]:
-            if b not in (dominators[b_frontier] - {b_frontier}):
-                S.add(b_frontier)
-    DF[b] = S
-
-
-def computeDF(cfg: CFG, dominators: Dict[Block, Set[Block]],
+@timed("computeDF")
+def computeDF(cfg: CFG, dominators: Dict[Block, AbstractSet[Block]],
               DT: Dict[Block, Set[Block]], dom_graphs: bool, basename: str
               ) -> Dict[Block, Set[Block]]:
     """
     `computeDF(...)` computes the dominance frontier of a CFG.
     It returns `DF` which associates a block to its frontier.
 
+    A block b is in the frontier of the blocks that dominate a predecessor
+    of b without strictly dominating b. So, for each predecessor p of b,
+    a "runner" goes up the dominator tree `DT` from p to the immediate
+    dominator of b, adding b to the frontier of each block on its way
+    (Cooper, Harvey and Kennedy). This needs neither recursion nor
+    the sets of `dominators`.
+
     This is an helper function called during SSA entry.
     """
-    DF: Dict[Block, Set[Block]] = dict()
-    for b_entry in cfg.get_entries():
-        _computeDF_at_block(cfg, dominators, DT, b_entry, DF)
+    idom: Dict[Block, Block] = {child: b for b, children in DT.items()
+                                for child in children}
+    DF: Dict[Block, Set[Block]] = {b: set() for b in cfg.get_blocks()}
+    for b in cfg.get_blocks():
+        idom_b = idom.get(b)
+        for pred in b.get_in():
+            runner: Block | None = pred
+            while runner is not None and runner is not idom_b:
+                DF[runner].add(b)
+                runner = idom.get(runner)
     # Print the domination frontier on the CFG if asked
     if dom_graphs:
         s = "{}.{}.ssa.DF.dot".format(basename, cfg.fdata.get_name())
@@ -16,3 +16,8 @@ class MiniCTypeError(Exception):
 
 class AllocationError(Exception):
     pass
+
+
+class MiniCStepLimitError(MiniCRuntimeError):
+    """Raised when the evaluation exceeds its step budget (--max-steps)."""
+    pass
@@ -1,8 +1,10 @@
 """ Python Classes for Oriented and Non Oriented Graphs
 """
 
+import heapq
+from collections import deque
 from graphviz import Digraph  # for dot output
-from typing import List, Dict, Set, Tuple, Any
+from typing import List, Deque, Dict, Set, Tuple, Any
 
 
 class GraphError(Exception):
@@ -72,16 +74,21 @@ class GeneralGraph(object):
         """
         Compute a depth first search of the graph,
         from the vertex root.
+        Return the vertices in the order they are visited, each one once.
         """
-        seen: List[Any] = []
+        order: List[Any] = []
+        seen: Set[Any] = set()
         todo: List[Any] = [root]
-        while len(todo) > 0:  # while todo ...
+        while todo:
             current = todo.pop()
-            seen.append(current)
+            if current in seen:  # pushed again before being visited
+                continue
+            seen.add(current)
+            order.append(current)
             for neighbour in self.graph_dict[current]:
                 if neighbour not in seen:
                     todo.append(neighbour)
-        return seen
+        return order
 
     def is_reachable_from(self, v1: Any, v2: Any) -> bool:
         """True if there is a path from v1 to v2."""
@@ -93,28 +100,33 @@ class GeneralGraph(object):
         each component being a list of vetices.
         """
         components: List[List[Any]] = []
-        done: List[Any] = []
-        for v in self.vertices():
+        done: Set[Any] = set()
+        for v in self.graph_dict:
             if v not in done:
                 v_comp = self.dfs_traversal(v)
                 components.append(v_comp)
-                done.extend(v_comp)
+                done.update(v_comp)
         return components
 
     def bfs_traversal(self, root: Any) -> List[Any]:
         """
         Compute a breadth first search of the graph,
         from the vertex root.
+        Return the vertices in the order they are visited, each one once.
         """
-        seen: List[Any] = []
-        todo: List[Any] = [root]
-        while len(todo) > 0:  # while todo ...
-            current = todo.pop(0)  # list.pop(0): for dequeuing (on the left...) !
-            seen.append(current)
+        order: List[Any] = []
+        seen: Set[Any] = set()
+        todo: Deque[Any] = deque([root])
+        while todo:
+            current = todo.popleft()
+            if current in seen:  # enqueued again before being visited
+                continue
+            seen.add(current)
+            order.append(current)
             for neighbour in self.graph_dict[current]:
                 if neighbour not in seen:
                     todo.append(neighbour)
-        return seen
+        return order
 
 
 class Graph(GeneralGraph):
@@ -126,10 +138,13 @@ class Graph(GeneralGraph):
         (they appear twice in the dictionnary).
         Return a list of sets.
         """
+        # Each edge is listed from the first of its vertices.
+        index = {vertex: i for i, vertex in enumerate(self.graph_dict)}
         edges = []
-        for vertex in self.graph_dict:
-            for neighbour in self.graph_dict[vertex]:
-                if {neighbour, vertex} not in edges:
+        for vertex, neighbours in self.graph_dict.items():
+            i = index[vertex]
+            for neighbour in neighbours:
+                if index[neighbour] > i:
                     edges.append({vertex, neighbour})
         return edges
 
@@ -200,6 +215,52 @@ class Graph(GeneralGraph):
         coloring, _, _ = self.color_with_k_colors()
         return coloring
 
+    def view(self) -> 'GraphView':
+        """
+        Return a view of the graph from which vertices can be removed
+        without modifying the graph (see :py:class:`GraphView`).
+        """
+        return GraphView(self)
+
+    @staticmethod
+    def _simplification_order(view: 'GraphView') -> List[Any]:
+        """
+        Remove all the vertices of `view`, and return them in the order
+        of the simplification: repeatedly remove a vertex of minimal
+        degree in the remaining graph, the one with the smallest name
+        (str) among them, then the first one in the graph.
+
+        The vertices are kept in buckets by degree, each one a heap
+        ordered by name: removing a vertex moves its neighbours
+        to the bucket below. Entries of vertices that have been removed
+        or have moved are skipped when popped.
+        """
+        vertices = view.vertices()
+        index = {v: i for i, v in enumerate(vertices)}
+        buckets: List[List[Tuple[str, int, Any]]] = [
+            [] for _ in range(max(map(view.degree, vertices), default=0) + 1)]
+        for v in vertices:
+            buckets[view.degree(v)].append((str(v), index[v], v))
+        for bucket in buckets:
+            heapq.heapify(bucket)
+        order: List[Any] = []
+        min_degree = 0
+        while len(order) < len(vertices):
+            bucket = buckets[min_degree]
+            if not bucket:
+                min_degree += 1
+                continue
+            _, _, v = heapq.heappop(bucket)
+            if v not in view or view.degree(v) != min_degree:
+                continue
+            order.append(v)
+            view.delete_vertex(v)
+            for x in view.neighbours(v):
+                heapq.heappush(buckets[view.degree(x)], (str(x), index[x], x))
+            # The degrees of the neighbours are at least min_degree - 1
+            min_degree = max(min_degree - 1, 0)
+        return order
+
     # see algo of the course
     def color_with_k_colors(self, K=None, avoidingnodes=()) -> Tuple[Dict[Any, int], bool, List]:
         """
@@ -217,34 +278,28 @@ class Graph(GeneralGraph):
         """
         if K is None:
             K = len(self.graph_dict)
-        todo_vertices = []
         is_total = True
-        gcopy = Graph(self.graph_dict.copy())
+        # The graph itself is not modified: vertices are removed from a view.
+        view = self.view()
         # suppress nodes that are not to be considered.
         for node in avoidingnodes:
-            gcopy.delete_vertex(node)
-        # append nodes in the list according to their degree and node number:
-        while gcopy.graph_dict:
-            todo = list(gcopy.graph_dict)
-            todo.sort(key=lambda v: (len(gcopy.graph_dict[v]), str(v)))
-            lower = todo[0]
-            todo_vertices.append(lower)
-            gcopy.delete_vertex(lower)
+            view.delete_vertex(node)
+        todo_vertices = self._simplification_order(view)
         # Now reverse the list: first elements are those with higher degree
-        # print(todo_vertices)
         todo_vertices.reverse()  # in place reversal
-        # print(todo_vertices)
-        coloring = {}
+        coloring: Dict[Any, int] = {}
         colored_nodes = []
-        # gdict will be the coloring map to return
         gdict = self.graph_dict
         for v in todo_vertices:
-            seen_neighbours = [x for x in gdict[v] if x in coloring]
-            choose_among = [i for i in range(K) if not (
-                i in [coloring[v1] for v1 in seen_neighbours])]
-            if choose_among:
-                # if the node can be colored, I choose the minimal color.
-                color = min(choose_among)
+            # Bit i of used is set if a colored neighbour has color i
+            used = 0
+            for x in gdict[v]:
+                c = coloring.get(x)
+                if c is not None:
+                    used |= 1 << c
+            # The minimal color not used: the lowest 0 bit of used
+            color = (~used & (used + 1)).bit_length() - 1
+            if color < K:
                 coloring[v] = color
                 colored_nodes.append(v)
             else:
@@ -254,12 +309,84 @@ class Graph(GeneralGraph):
         return (coloring, is_total, colored_nodes)
 
 
+class GraphView:
+    """
+    A non oriented graph minus some removed vertices, for algorithms
+    that remove vertices from a graph they must not modify,
+    e.g. the coloring of :py:meth:`Graph.color_with_k_colors`.
+
+    The view shares the neighbour sets of the graph: it only keeps the
+    degrees of the vertices in the remaining graph and the removed
+    vertices, so creating it costs O(V) instead of the O(V + E) of
+    a copy. The graph must not be modified while the view is used.
+    """
+
+    _graph_dict: Dict[Any, Set]
+    _degree: Dict[Any, int]
+    _removed: Set[Any]
+
+    def __init__(self, graph: Graph):
+        self._graph_dict = graph.graph_dict
+        self._degree = {v: len(neighbours) for v, neighbours in graph.graph_dict.items()}
+        self._removed = set()
+
+    def __contains__(self, vertex: Any) -> bool:
+        return vertex in self._graph_dict and vertex not in self._removed
+
+    def __len__(self) -> int:
+        return len(self._graph_dict) - len(self._removed)
+
+    def vertices(self) -> List[Any]:
+        """Return the remaining vertices, in the order of the graph."""
+        return [v for v in self._graph_dict if v not in self._removed]
+
+    def degree(self, vertex: Any) -> int:
+        """Return the degree of `vertex` in the remaining graph."""
+        return self._degree[vertex]
+
+    def neighbours(self, vertex: Any) -> List[Any]:
+        """Return the remaining neighbours of `vertex`."""
+        return [x for x in self._graph_dict[vertex] if x not in self._removed]
+
+    def delete_vertex(self, vertex: Any) -> None:
+        """Remove a vertex and all the adjacent edges from the view."""
+        if vertex in self._removed:
+            return
+        self._removed.add(vertex)
+        for x in self._graph_dict[vertex]:
+            if x not in self._removed:
+                self._degree[x] -= 1
+
+
 class DiGraph(GeneralGraph):
-    """Class for directed graphs."""
+    """
+    Class for directed graphs.
+
+    The predecessors of each vertex are kept in a reverse adjacency map,
+    so the graph must be modified through its methods,
+    not through graph_dict.
+    """
+
+    _pred_dict: Dict[Any, Set]
+
+    def __init__(self, graph_dict=None):
+        super().__init__(graph_dict)
+        self._pred_dict = {vertex: set() for vertex in self.graph_dict}
+        for vertex, dests in self.graph_dict.items():
+            for dest in dests:
+                self._pred_dict.setdefault(dest, set()).add(vertex)
+        # Destinations missing from graph_dict are vertices without successors
+        for vertex in self._pred_dict:
+            self.add_vertex(vertex)
+
+    def add_vertex(self, vertex: Any) -> None:
+        super().add_vertex(vertex)
+        if vertex not in self._pred_dict:
+            self._pred_dict[vertex] = set()
 
     def pred(self, v: Any) -> Set:
         """Return all predecessors of the vertex `v` in the graph."""
-        return {src for src, dests in self.graph_dict.items() if v in dests}
+        return set(self._pred_dict[v])
 
     def neighbourhoods(self) -> List[Tuple[Any, Set]]:
         """Return all neighbourhoods in the graph."""
@@ -280,12 +407,10 @@ class DiGraph(GeneralGraph):
         (we call g.add_edge((v1,v2)))
         """
         (vertex1, vertex2) = edge
-        if vertex1 in self.graph_dict:
-            self.graph_dict[vertex1].add(vertex2)
-        else:
-            self.graph_dict[vertex1] = {vertex2}
-        if vertex2 not in self.graph_dict:
-            self.graph_dict[vertex2] = set()
+        self.add_vertex(vertex1)
+        self.add_vertex(vertex2)
+        self.graph_dict[vertex1].add(vertex2)
+        self._pred_dict[vertex2].add(vertex1)
 
     def print_dot(self, name: str) -> None:
         """Print the graph."""
@@ -301,12 +426,15 @@ class DiGraph(GeneralGraph):
 
     def delete_vertex(self, vertex: Any) -> None:
         """Delete a vertex and all the adjacent edges."""
-        for node, neighbours in self.graph_dict.items():
-            if vertex in neighbours:
-                neighbours.remove(vertex)
+        for dest in self.graph_dict[vertex]:
+            self._pred_dict[dest].discard(vertex)
+        for src in self._pred_dict[vertex]:
+            self.graph_dict[src].discard(vertex)
         del self.graph_dict[vertex]
+        del self._pred_dict[vertex]
 
     def delete_edge(self, edge: Tuple[Any, Any]) -> None:
         """Delete an edge."""
         (v1, v2) = edge
         self.graph_dict[v1].remove(v2)
+        self._pred_dict[v2].remove(v1)
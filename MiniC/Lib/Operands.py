@@ -9,16 +9,25 @@ The class :py:class:`DataLocation` itself has subclasses:
 for location not yet allocated.
 
 This file also define shortcuts for registers in RISCV.
+
+Operands are small objects with ``__slots__`` (no per-instance ``__dict__``).
+Conditions, registers and immediates are values: they are equal when they
+denote the same condition, register or constant. Conditions and registers
+are interned (``Register(10) is A0``), and so are the immediates between
+:py:data:`SMALL_IMMEDIATE_MIN` and :py:data:`SMALL_IMMEDIATE_MAX`, so
+building instructions does not allocate new operands for them.
+Temporaries are equal only to themselves.
 """
 
 from typing import Dict, List
 from MiniCParser import MiniCParser
+from Lib.Bitset import Numbering
 from Lib.Errors import MiniCInternalError
 
 
 class Operand():
 
-    pass
+    __slots__ = ()
 
 
 # signed version for riscv
@@ -50,29 +59,54 @@ class Condition(Operand):
     in opdict).
 
     A 'negate' method allows getting the negation of this condition.
+
+    There is a single Condition for each comparison:
+    ``Condition(MiniCParser.LT) is Condition('blt')``.
     """
 
+    __slots__ = ('_op',)
+
     _op: str
 
-    def __init__(self, optype):
+    def __new__(cls, optype):
         if optype in opdict:
-            self._op = opdict[optype]
+            op = opdict[optype]
         elif str(optype) in all_ops:
-            self._op = str(optype)
+            op = str(optype)
         else:
             raise MiniCInternalError("Unsupported comparison operator %s", optype)
+        cond = _conditions.get(op)
+        if cond is None:
+            cond = _conditions[op] = super().__new__(cls)
+            cond._op = op
+        return cond
+
+    def __getnewargs__(self):
+        return (self._op,)
 
     def negate(self) -> 'Condition':
         """Return the opposite condition."""
         return Condition(opnot_dict[self._op])
 
+    def __eq__(self, other):
+        return isinstance(other, Condition) and self._op == other._op
+
+    def __hash__(self):
+        return hash(self._op)
+
     def __str__(self):
         return self._op
 
 
+# Interned conditions, by name
+_conditions: Dict[str, Condition] = dict()
+
+
 class Function(Operand):
     """Operand for build-in function call."""
 
+    __slots__ = ('_name',)
+
     _name: str
 
     def __init__(self, name: str):
@@ -87,7 +121,7 @@ class DataLocation(Operand):
     or a place in memory (offset).
     """
 
-    pass
+    __slots__ = ()
 
 
 # map for register shortcuts
@@ -100,12 +134,21 @@ reg_map = dict([(0, 'zero'), (1, 'ra'), (2, 'sp')] +  # no (3, 'gp') nor (4, 'tp
 
 
 class Register(DataLocation):
-    """ A (physical) register."""
+    """ A (physical) register. There is a single Register for each number."""
+
+    __slots__ = ('_number',)
 
     _number: int
 
-    def __init__(self, number: int):
-        self._number = number
+    def __new__(cls, number: int):
+        reg = _registers.get(number)
+        if reg is None:
+            reg = _registers[number] = super().__new__(cls)
+            reg._number = number
+        return reg
+
+    def __getnewargs__(self):
+        return (self._number,)
 
     def __repr__(self):
         if self._number not in reg_map:
@@ -120,6 +163,10 @@ class Register(DataLocation):
         return self._number
 
 
+# Interned registers, by number
+_registers: Dict[int, Register] = dict()
+
+
 # Shortcuts for registers in RISCV
 # Only integer registers
 ZERO = Register(0)
@@ -141,6 +188,8 @@ GP_REGS = S[4:] + T  # s0, s1, s2 and s3 are special
 class Offset(DataLocation):
     """ Offset = address in memory computed with base + offset."""
 
+    __slots__ = ('_basereg', '_offset')
+
     _basereg: Register
     _offset: int
 
@@ -151,28 +200,66 @@ class Offset(DataLocation):
     def __repr__(self):
         return ("{}({})".format(self._offset, self._basereg))
 
+    def __eq__(self, other):
+        return (isinstance(other, Offset) and self._offset == other._offset
+                and self._basereg == other._basereg)
+
+    def __hash__(self):
+        return hash((self._basereg, self._offset))
+
     def get_offset(self) -> int:
         """Return the value of the offset."""
         return self._offset
 
 
+#: Smallest and largest immediates that are interned
+SMALL_IMMEDIATE_MIN = -2048
+SMALL_IMMEDIATE_MAX = 2047
+
+
 class Immediate(DataLocation):
     """Immediate operand (integer)."""
 
+    __slots__ = ('_val',)
+
     _val: int
 
-    def __init__(self, val):
-        self._val = val
+    def __new__(cls, val):
+        small = type(val) is int and SMALL_IMMEDIATE_MIN <= val <= SMALL_IMMEDIATE_MAX
+        if small:
+            imm = _small_immediates.get(val)
+            if imm is not None:
+                return imm
+        imm = super().__new__(cls)
+        imm._val = val
+        if small:
+            _small_immediates[val] = imm
+        return imm
+
+    def __getnewargs__(self):
+        return (self._val,)
+
+    def __eq__(self, other):
+        return isinstance(other, Immediate) and self._val == other._val
+
+    def __hash__(self):
+        return hash(self._val)
 
     def __str__(self):
         return str(self._val)
 
 
+# Interned immediates, by value (for the 12-bit immediates of RISCV)
+_small_immediates: Dict[int, Immediate] = dict()
+
+
 class Temporary(DataLocation):
     """Temporary, a location that has not been allocated yet.
     It will later be mapped to a physical register (Register) or to a memory location (Offset).
     """
 
+    __slots__ = ('_number', '_pool')
+
     _number: int
     _pool: 'TemporaryPool'
 
@@ -194,16 +281,25 @@ class TemporaryPool:
     _all_temps: List[Temporary]
     _current_num: int
     _allocation: Dict[Temporary, DataLocation]
+    _numbering: Numbering
 
     def __init__(self):
         self._all_temps = []
         self._current_num = 0
         self._allocation = dict()
+        self._numbering = Numbering()
 
     def get_all_temps(self) -> List[Temporary]:
         """Return all the temporaries of the pool."""
         return self._all_temps
 
+    def get_numbering(self) -> Numbering:
+        """
+        Return the numbering of the temporaries of the pool,
+        for :py:class:`bitsets <Lib.Bitset.Bitset>` of temporaries.
+        """
+        return self._numbering
+
     def get_alloced_loc(self, t: Temporary) -> DataLocation:
         """Get the actual DataLocation allocated for the temporary t."""
         return self._allocation[t]
@@ -211,6 +307,7 @@ class TemporaryPool:
     def add_tmp(self, t: Temporary):
         """Add a temporary to the pool."""
         self._all_temps.append(t)
+        self._numbering.number(t)
         self._allocation[t] = t  # While no allocation, return the temporary itself
 
     def set_temp_allocation(self, allocation: Dict[Temporary, DataLocation]) -> None:
@@ -12,7 +12,7 @@ from Lib.Operands import Operand, Temporary, DataLocation, Renamer
 from Lib.Statement import Statement, Label
 
 
-@dataclass
+@dataclass(eq=False)
 class PhiNode(Statement):
     """
     A φ node is a renaming in the CFG, of the form temp_x = φ(temp_0, ..., temp_n).
@@ -51,8 +51,5 @@ class PhiNode(Statement):
     def __str__(self):
         return "{} = φ({})".format(self.var, self.srcs)
 
-    def __hash__(self):
-        return hash((self.var, *self.srcs.items()))
-
     def printIns(self, stream):
         print('        # ' + str(self), file=stream)
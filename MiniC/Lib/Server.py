@@ -0,0 +1,158 @@
+"""
+A compile server avoiding the start-up cost of the compiler (Python
+interpreter, ANTLR runtime, generated parser...) on each compilation.
+
+The server (``MiniCC.py --serve <socket>``) listens on a Unix socket.
+For each request, it forks a child that runs the compiler in-process
+on the given command-line arguments, in the directory of the client,
+and sends back the exit code and the output (stdout and stderr) of
+the compiler. The client side is :py:func:`request`
+(see also ``MiniCCClient.py``).
+
+The protocol is a single JSON object each way: the client sends
+``{"argv": [...], "cwd": ...}`` then closes its side of the connection,
+the server answers ``{"exitcode": ..., "output": ...}``.
+
+A compilation (including the evaluation of the program with
+``--mode eval``) is killed after :py:data:`TIMEOUT` seconds, and the
+client gives up after the same delay, like the tests running the
+compiler in a subprocess.
+"""
+
+import json
+import os
+import signal
+import socket
+import sys
+import tempfile
+import traceback
+from typing import Callable, List, Tuple
+
+#: Default time limit of a compilation, in seconds
+TIMEOUT = 60
+
+
+def _exit_code(e: SystemExit) -> int:
+    """Return the exit status of the process for the given SystemExit."""
+    if e.code is None:
+        return 0
+    if isinstance(e.code, int):
+        return e.code
+    print(e.code, file=sys.stderr)
+    return 1
+
+
+def run_captured(f: Callable, *args) -> Tuple[int, str]:
+    """
+    Run `f(*args)` with the standard output and error redirected,
+    and return its exit code (0 if it returns normally) and its output.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    with tempfile.TemporaryFile() as out:
+        saved = os.dup(1), os.dup(2)
+        os.dup2(out.fileno(), 1)
+        os.dup2(out.fileno(), 2)
+        try:
+            try:
+                f(*args)
+                code = 0
+            except SystemExit as e:
+                code = _exit_code(e)
+            except Exception:
+                # Like an uncaught exception in the Python interpreter
+                traceback.print_exc()
+                code = 1
+            finally:
+                for stream in (sys.stdout, sys.stderr):
+                    if not stream.closed:
+                        stream.flush()
+        finally:
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            os.close(saved[0])
+            os.close(saved[1])
+        out.seek(0)
+        output = out.read().decode(errors='replace')
+    return code, output
+
+
+def _recv_all(conn: socket.socket) -> bytes:
+    chunks = []
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+def _handle(conn: socket.socket, handler: Callable[[List[str]], None]) -> None:
+    """Serve one request, in a forked child."""
+    req = json.loads(_recv_all(conn))
+    os.chdir(req["cwd"])
+    code, output = run_captured(handler, req["argv"])
+    conn.sendall(json.dumps({"exitcode": code, "output": output}).encode())
+    conn.close()
+
+
+def serve(socket_path: str, handler: Callable[[List[str]], None],
+          timeout: int = TIMEOUT) -> None:
+    """
+    Listen on the Unix socket `socket_path` and run `handler(argv)`
+    for each request, until interrupted.
+    The child serving a request is killed after `timeout` seconds
+    (the client then gets no answer).
+    """
+    if os.path.exists(socket_path):
+        os.remove(socket_path)  # Stale socket from a previous server
+    # Children are reaped automatically.
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    # Clean up the socket when killed.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen(64)
+    print("Compile server listening on " + socket_path, flush=True)
+    try:
+        while True:
+            conn, _ = server.accept()
+            if os.fork() == 0:
+                server.close()
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                # SIGALRM terminates the child (default action).
+                signal.signal(signal.SIGALRM, signal.SIG_DFL)
+                signal.alarm(timeout)
+                try:
+                    _handle(conn, handler)
+                finally:
+                    os._exit(0)
+            conn.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        os.remove(socket_path)
+
+
+def request(socket_path: str, argv: List[str], cwd: str | None = None,
+            timeout: float | None = TIMEOUT) -> Tuple[int, str]:
+    """
+    Ask the server listening on `socket_path` to run the compiler
+    with the arguments `argv` in the directory `cwd` (the current one by default).
+    Return the exit code and the output of the compiler.
+    Raise TimeoutError if there is no answer after `timeout` seconds
+    (None to wait forever), and ConnectionError if the server closed
+    the connection without answering (e.g. it killed the compilation).
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(timeout)
+        conn.connect(socket_path)
+        conn.sendall(json.dumps({"argv": argv,
+                                 "cwd": cwd or os.getcwd()}).encode())
+        conn.shutdown(socket.SHUT_WR)
+        data = _recv_all(conn)
+    if not data:
+        raise ConnectionError("The compile server gave no answer for: " + " ".join(argv))
+    answer = json.loads(data)
+    return answer["exitcode"], answer["output"]
@@ -7,7 +7,8 @@ is inherited by :py:class:`Instru3A`
 :py:class:`AbsoluteJump` and :py:class:`ConditionalJump`.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from itertools import count
 from typing import (List, Dict, TypeVar)
 from Lib.Operands import (Operand, Renamer, Temporary, Condition)
 from Lib.Errors import MiniCInternalError
@@ -22,9 +23,31 @@ def regset_to_string(registerset):
 TStatement = TypeVar("TStatement", bound="Statement")
 
 
-@dataclass(unsafe_hash=True)
+# Identifiers of the statements, in order of creation
+_statement_ids = count()
+
+
+@dataclass(eq=False)
 class Statement:
-    """A Statement, which is an instruction, a comment or a label."""
+    """
+    A Statement, which is an instruction, a comment or a label.
+
+    Statements (except labels) are compared by identity: two statements
+    are equal only if they are the same object, even when they print the
+    same (e.g. the ``return`` of two blocks), so that they can be used
+    as keys of the maps of the analyses. They are hashed by an
+    identifier given at creation.
+    """
+
+    _uid: int = field(init=False, repr=False, compare=False)
+
+    def __new__(cls, *args, **kwargs):
+        stat = super().__new__(cls)
+        stat._uid = next(_statement_ids)
+        return stat
+
+    def __hash__(self):
+        return self._uid
 
     def defined(self) -> List[Operand]:
         return []
@@ -45,7 +68,7 @@ class Statement:
         raise NotImplementedError
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(eq=False)
 class Comment(Statement):
     """A comment."""
     comment: str
@@ -59,7 +82,10 @@ class Comment(Statement):
 
 @dataclass(unsafe_hash=True)
 class Label(Statement, Operand):
-    """A label is both a Statement and an Operand."""
+    """
+    A label is both a Statement and an Operand.
+    Unlike other statements, labels are equal when they have the same name.
+    """
     name: str
 
     def __str__(self):
@@ -72,7 +98,7 @@ class Label(Statement, Operand):
         print(str(self) + ':', file=stream)
 
 
-@dataclass(init=False)
+@dataclass(init=False, eq=False)
 class Instruction(Statement):
     ins: str
     _read_only: bool
@@ -117,15 +143,12 @@ class Instruction(Statement):
                 s += ', ' + str(arg)
         return s
 
-    def __hash__(self):
-        return hash((self.ins, *self.args()))
-
     def printIns(self, stream):
         """Print the instruction on the output."""
         print('       ', str(self), file=stream)
 
 
-@dataclass(init=False)
+@dataclass(init=False, eq=False)
 class Instru3A(Instruction):
     _args: List[Operand]
 
@@ -167,11 +190,8 @@ class Instru3A(Instruction):
                 for arg in self.args()]
         return Instru3A(self.ins, *args)
 
-    def __hash__(self):
-        return hash(super)
-
 
-@dataclass(init=False)
+@dataclass(init=False, eq=False)
 class AbsoluteJump(Instruction):
     """ An Absolute Jump is a specific kind of instruction"""
     ins = "j"
@@ -194,14 +214,11 @@ class AbsoluteJump(Instruction):
                 .format(self))
         return self
 
-    def __hash__(self):
-        return hash(super)
-
     def targets(self) -> List[Label]:
         return [self.label]
 
 
-@dataclass(init=False)
+@dataclass(init=False, eq=False)
 class ConditionalJump(Instruction):
     """ A Conditional Jump is a specific kind of instruction"""
     cond: Condition
@@ -237,6 +254,3 @@ class ConditionalJump(Instruction):
         op2 = subst.get(self.op2, self.op2) if isinstance(self.op2, Temporary) \
             else self.op2
         return ConditionalJump(self.cond, op1, op2, self.label)
-
-    def __hash__(self):
-        return hash(super)
@@ -16,6 +16,12 @@ There are three kinds of terminators:
 
 During the construction of the CFG, :py:func:`jump2terminator` builds
 a terminator for each extracted chunk of instructions.
+
+The CFG caches the successors of its blocks and its depth-first orders
+until it is modified. After changing the targets of a terminator in
+place (e.g. ``term.label_then = label``), call
+:py:meth:`Block.set_terminator <Lib.CFG.Block.set_terminator>` again
+with it: otherwise the CFG keeps giving the former successors.
 """
 
 from dataclasses import dataclass
@@ -25,7 +31,7 @@ from Lib.Operands import Operand, Renamer, Temporary, Condition
 from Lib.Statement import AbsoluteJump, ConditionalJump, Instruction, Label, Statement
 
 
-@dataclass(unsafe_hash=True)
+@dataclass(eq=False)
 class Return(Statement):
     """A terminator that marks the end of the function."""
 
@@ -56,9 +62,12 @@ class Return(Statement):
         return True
 
 
-@dataclass(init=False)
+@dataclass(init=False, eq=False)
 class BranchingTerminator(Instruction):
-    """A terminating statement with a condition."""
+    """
+    A terminating statement with a condition.
+    See the module documentation before modifying the labels in place.
+    """
 
     #: The condition of the branch
     cond: Condition
@@ -106,9 +115,6 @@ class BranchingTerminator(Instruction):
             else self.op2
         return BranchingTerminator(self.cond, op1, op2, self.label_then, self.label_else)
 
-    def __hash__(self):
-        return hash(super)
-
 
 Terminator = Return | AbsoluteJump | BranchingTerminator
 
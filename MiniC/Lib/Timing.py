@@ -0,0 +1,165 @@
+"""
+Utilities to measure the time and memory spent in each compilation pass,
+as reported by the ``--time-passes`` option of ``MiniCC.py``.
+
+A pass is delimited with the :py:func:`time_pass` context manager
+(or the :py:func:`timed` decorator). When no :py:class:`PassTimer` has been
+started with :py:func:`start_timing`, both do nothing, so passes can
+be annotated at no cost.
+"""
+
+import functools
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterator, List, Tuple
+
+
+@dataclass
+class PassRecord:
+    """Measures for one execution of a pass."""
+
+    #: Name of the pass
+    name: str
+    #: Name of the function being compiled, None for whole-program passes
+    function: str | None
+    #: Nesting depth of the pass (0 for top-level passes)
+    depth: int
+    #: Wall-clock time, in seconds
+    wall: float = 0.
+    #: CPU time of the process, in seconds
+    cpu: float = 0.
+    #: Peak memory allocated during the pass (tracemalloc), in bytes
+    peak_mem: int = 0
+
+
+class PassTimer:
+    """
+    Record wall time, CPU time and peak memory usage of passes,
+    grouped by compiled function (see :py:meth:`set_function`).
+
+    Passes may be nested: the peak memory of a pass includes the one
+    of the passes it runs.
+    """
+
+    _records: List[PassRecord]
+    _function: str | None
+    # Stack of the peaks reached by the passes being run
+    _peaks: List[int]
+
+    def __init__(self):
+        self._records = []
+        self._function = None
+        self._peaks = []
+
+    def get_records(self) -> List[PassRecord]:
+        """Return all the records, in the order the passes were started."""
+        return self._records
+
+    def set_function(self, name: str | None) -> None:
+        """Attribute the next passes to the function `name`."""
+        self._function = name
+
+    @contextmanager
+    def time_pass(self, name: str) -> Iterator[PassRecord]:
+        """Measure the pass `name` run in the body of the `with` statement."""
+        start_mem, peak = tracemalloc.get_traced_memory()
+        if self._peaks:
+            # Remember the peak reached so far by the enclosing pass.
+            self._peaks[-1] = max(self._peaks[-1], peak)
+        tracemalloc.reset_peak()
+        self._peaks.append(0)
+        record = PassRecord(name, self._function, len(self._peaks) - 1)
+        self._records.append(record)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield record
+        finally:
+            record.wall = time.perf_counter() - wall
+            record.cpu = time.process_time() - cpu
+            peak = max(tracemalloc.get_traced_memory()[1], self._peaks.pop())
+            record.peak_mem = max(peak - start_mem, 0)
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            tracemalloc.reset_peak()
+
+    def totals(self) -> Dict[str, Tuple[float, float, int]]:
+        """
+        Return, for each pass name, the total wall and CPU times
+        and the maximal peak memory over all functions.
+        """
+        res: Dict[str, Tuple[float, float, int]] = dict()
+        for r in self._records:
+            wall, cpu, mem = res.get(r.name, (0., 0., 0))
+            res[r.name] = (wall + r.wall, cpu + r.cpu, max(mem, r.peak_mem))
+        return res
+
+    def print_table(self, stream) -> None:
+        """Print the records, then the totals by pass, as a table."""
+        header = "{:<16} {:<24} {:>10} {:>10} {:>12}".format(
+            "function", "pass", "wall (ms)", "cpu (ms)", "peak (KiB)")
+        line = "{:<16} {:<24} {:>10.2f} {:>10.2f} {:>12.1f}"
+        print(header, file=stream)
+        for r in self._records:
+            print(line.format(r.function or "-", "  " * r.depth + r.name,
+                              r.wall * 1000, r.cpu * 1000, r.peak_mem / 1024),
+                  file=stream)
+        print("\nTotals by pass:", file=stream)
+        print(header, file=stream)
+        for name, (wall, cpu, mem) in self.totals().items():
+            print(line.format("*", name, wall * 1000, cpu * 1000, mem / 1024),
+                  file=stream)
+
+    def dump_json(self, stream) -> None:
+        """Dump the records as a JSON list."""
+        json.dump([asdict(r) for r in self._records], stream, indent=2)
+        print(file=stream)
+
+
+# The timer in use, if any
+_timer: PassTimer | None = None
+
+
+def start_timing() -> PassTimer:
+    """Start recording the passes, and return the corresponding timer."""
+    global _timer
+    tracemalloc.start()
+    _timer = PassTimer()
+    return _timer
+
+
+def stop_timing() -> None:
+    """Stop recording the passes."""
+    global _timer
+    _timer = None
+    tracemalloc.stop()
+
+
+def set_function(name: str | None) -> None:
+    """Attribute the next passes to the function `name`, if timing is enabled."""
+    if _timer is not None:
+        _timer.set_function(name)
+
+
+@contextmanager
+def time_pass(name: str) -> Iterator[None]:
+    """Measure the pass `name` run in the body of the `with` statement, if timing is enabled."""
+    if _timer is None:
+        yield
+    else:
+        with _timer.time_pass(name):
+            yield
+
+
+def timed(name: str):
+    """Decorator measuring each call to the decorated function as the pass `name`."""
+    def decorator(f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            with time_pass(name):
+                return f(*args, **kwargs)
+        return wrapper
+    return decorator
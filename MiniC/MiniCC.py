@@ -3,9 +3,11 @@
 Evaluation and code generation labs, main file.
 Usage:
     python3 MiniCC.py --mode <mode> <filename>
+    python3 MiniCC.py --mode <mode> <filename or pattern> [<filename or pattern> ...]
+    python3 MiniCC.py --serve <socket>
     python3 MiniCC.py --help
 """
-from typing import cast
+from typing import cast, Dict, List, Tuple
 from enum import Enum
 
 from MiniCLexer import MiniCLexer
@@ -13,13 +15,24 @@ from MiniCParser import MiniCParser
 from TP03.MiniCTypingVisitor import MiniCTypingVisitor, MiniCTypeError
 from TP03.MiniCInterpretVisitor import MiniCInterpretVisitor
 from Lib.Errors import (MiniCUnsupportedError, MiniCInternalError,
-                        MiniCRuntimeError, AllocationError)
+                        MiniCRuntimeError, MiniCStepLimitError, AllocationError)
+from Lib import Timing
+from Lib.Server import serve, run_captured
+from Lib.Cache import CompileCache
+from Lib.AST import Node, lower, dump_ast, load_ast
 
-from antlr4 import FileStream, CommonTokenStream
+from antlr4 import FileStream, CommonTokenStream, PredictionMode
 from antlr4.error.ErrorListener import ErrorListener
+from antlr4.error.ErrorStrategy import BailErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
 
 from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
 from traceback import print_exc
+import glob
+import io
 import os
 import sys
 
@@ -82,9 +95,87 @@ class CountErrorListener(ErrorListener):
         self.count += 1
 
 
+def parse_tree(inputname, counter: CountErrorListener
+               ) -> Tuple[MiniCParser, MiniCParser.ProgContext]:
+    """
+    Parse the file `inputname`, reporting errors to `counter`.
+
+    A first pass uses the faster SLL prediction mode and silently stops
+    at the first error. SLL may fail on valid programs, so only then is
+    the file parsed again with the full LL prediction mode, which reports
+    the actual errors, if any, exactly as a single LL pass would.
+    """
+    input_s = FileStream(inputname, encoding='utf-8')
+    lexer = MiniCLexer(input_s)
+    sll_counter = CountErrorListener()
+    lexer._listeners = [sll_counter]
+    parser = MiniCParser(CommonTokenStream(lexer))
+    parser._listeners = []
+    parser._errHandler = BailErrorStrategy()
+    parser._interp.predictionMode = PredictionMode.SLL
+    try:
+        tree = parser.prog()
+        if sll_counter.count == 0:
+            return parser, tree
+    except ParseCancellationException:
+        pass
+    input_s.reset()
+    lexer = MiniCLexer(input_s)
+    lexer._listeners.append(counter)
+    parser = MiniCParser(CommonTokenStream(lexer))
+    parser._listeners.append(counter)
+    parser._interp.predictionMode = PredictionMode.LL
+    return parser, parser.prog()
+
+
+def parse(inputname, counter: CountErrorListener, cache_dir=None) -> Node | None:
+    """
+    Parse the file `inputname`, reporting errors to `counter`, and return
+    the AST of the program (None if there are errors).
+    If `cache_dir` is given, reuse the AST cached there for the same
+    source (unless the cache entry cannot be read), or cache the AST
+    if the program is syntactically correct.
+    """
+    if cache_dir is not None:
+        cache = CompileCache(cache_dir, suffix=".ast")
+        with open(inputname, 'rb') as f:
+            cache_key = cache.key(f.read(), "ast")
+        data = cache.get_bytes(cache_key)
+        if data is not None:
+            ast = load_ast(data)
+            if ast is not None:
+                return ast
+        ast = parse(inputname, counter)
+        if ast is not None:
+            cache.put_bytes(cache_key, dump_ast(ast))
+        return ast
+    _, tree = parse_tree(inputname, counter)
+    if counter.count > 0:
+        return None
+    with Timing.time_pass("lower"):
+        return lower(tree)
+
+
+def preload_modules() -> None:
+    """Import all the modules the compiler may need, e.g. before forking a compile server."""
+    import importlib
+    for module in ("TP03.MiniCClosureInterpreter", "TP03.MiniCBytecode",
+                   "TP03.MiniCMonitoredInterpretVisitor",
+                   "TP04.MiniCCodeGen3AVisitor", "TP04.BuildCFG",
+                   "TP04.LinearizeCFG", "TP04.AllInMemAllocator",
+                   "Lib.Allocator", "Lib.CFG", "Lib.Analyses", "Lib.LinearCode",
+                   "TP05.EnterSSA", "TP05.ExitSSA", "TP05.LivenessSSA",
+                   "TP05.SmartAllocator", "TPoptim.OptimSSA"):
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+
 def main(inputname, reg_alloc, mode,
          typecheck=True, stdout=False, output_name=None, debug=False,
-         debug_graphs=False, ssa_graphs=False, dom_graphs=False):
+         debug_graphs=False, ssa_graphs=False, dom_graphs=False, cache_dir=None,
+         eval_engine="visitor", max_steps=None, profile=False):
     (basename, rest) = os.path.splitext(inputname)
     if mode.is_codegen():
         if stdout:
@@ -94,29 +185,66 @@ def main(inputname, reg_alloc, mode,
             output_name = basename + ".s"
             print("Code will be generated in file " + output_name)
 
-    input_s = FileStream(inputname, encoding='utf-8')
-    lexer = MiniCLexer(input_s)
+    # Reuse the code generated by a previous identical compilation, if any.
+    # Debugging outputs would not be reproduced, so don't use the cache then.
+    cache = None
+    cache_key = ""
+    if (cache_dir is not None and mode.is_codegen()
+            and not (debug or debug_graphs or ssa_graphs or dom_graphs)):
+        cache = CompileCache(cache_dir)
+        with Timing.time_pass("cache_lookup"):
+            with open(inputname, 'rb') as f:
+                cache_key = cache.key(f.read(), mode.name, reg_alloc, typecheck)
+            cached_code = cache.get(cache_key)
+        if cached_code is not None:
+            with open(output_name, 'w') if output_name else nullcontext(sys.stdout) as output:
+                output.write(cached_code)
+            return
+
     counter = CountErrorListener()
-    lexer._listeners.append(counter)
-    stream = CommonTokenStream(lexer)
-    parser = MiniCParser(stream)
-    parser._listeners.append(counter)
-    tree = parser.prog()
+    with Timing.time_pass("parse"):
+        ast = parse(inputname, counter, cache_dir)
     if counter.count > 0:
         exit(3)  # Syntax or lexicography errors occurred, don't try to go further.
+    assert ast is not None
     if typecheck:
         typing_visitor = MiniCTypingVisitor()
         try:
-            typing_visitor.visit(tree)
+            with Timing.time_pass("typecheck"):
+                typing_visitor.visit(ast)
         except MiniCTypeError as e:
             print(e.args[0])
             exit(2)
 
     if mode == Mode.EVAL:
-        # interpret Visitor
-        interpreter_visitor = MiniCInterpretVisitor()
         try:
-            interpreter_visitor.visit(tree)
+            with Timing.time_pass("eval"):
+                if eval_engine == "closures":
+                    from TP03.MiniCClosureInterpreter import interpret
+                    interpret(ast)
+                elif eval_engine == "vm":
+                    from TP03.MiniCBytecode import interpret
+                    interpret(ast)
+                else:
+                    # interpret Visitor
+                    if max_steps is not None or profile:
+                        from TP03.MiniCMonitoredInterpretVisitor import \
+                            MiniCMonitoredInterpretVisitor
+                        monitored_visitor = MiniCMonitoredInterpretVisitor(
+                            max_steps, profile)
+                        try:
+                            monitored_visitor.visit(ast)
+                        finally:
+                            if profile:
+                                with open(inputname, encoding='utf-8') as f:
+                                    monitored_visitor.print_profile(sys.stderr,
+                                                                    f.readlines())
+                    else:
+                        interpreter_visitor = MiniCInterpretVisitor()
+                        interpreter_visitor.visit(ast)
+        except MiniCStepLimitError as e:
+            print(e.args[0])
+            exit(6)
         except MiniCRuntimeError as e:
             print(e.args[0])
             exit(1)
@@ -132,19 +260,31 @@ def main(inputname, reg_alloc, mode,
 
     # Codegen 3@ CFG Visitor, first argument is debug mode
     from TP04.MiniCCodeGen3AVisitor import MiniCCodeGen3AVisitor  # type: ignore[import]
-    visitor3 = MiniCCodeGen3AVisitor(debug, parser)
-
-    # dump generated code on stdout or file.
-    with open(output_name, 'w') if output_name else sys.stdout as output:
-        visitor3.visit(tree)
+    # No parser: the nodes of the AST are printed without one
+    # (see Lib.AST.Node.toStringTree)
+    visitor3 = MiniCCodeGen3AVisitor(debug, None)
+
+    # dump generated code on stdout or file (through a buffer to fill the cache).
+    buffer = io.StringIO()
+    if cache is not None:
+        output_ctx = nullcontext(buffer)
+    elif output_name:
+        output_ctx = open(output_name, 'w')
+    else:
+        output_ctx = nullcontext(sys.stdout)
+    with output_ctx as output:
+        with Timing.time_pass("codegen3a"):
+            visitor3.visit(ast)
         for function in visitor3.get_functions():
             fdata = function.fdata
+            Timing.set_function(fdata.get_name())
             # Allocation part
             if mode == Mode.LINEAR:
                 code = function
             else:
                 from TP04.BuildCFG import build_cfg  # type: ignore[import]
-                code = build_cfg(function)
+                with Timing.time_pass("build_cfg"):
+                    code = build_cfg(function)
             if debug_graphs:
                 s = "{}.{}.dot".format(basename, code.fdata.get_name())
                 print("CFG:", s)
@@ -152,14 +292,23 @@ def main(inputname, reg_alloc, mode,
             if mode.value >= Mode.SSA.value:
                 from TP05.EnterSSA import enter_ssa  # type: ignore[import]
                 from Lib.CFG import CFG  # type: ignore[import]
-                enter_ssa(cast(CFG, code), dom_graphs, basename)
+                # The passes on the CFG are run through its analysis manager,
+                # which keeps the analyses they do not invalidate.
+                analyses = cast(CFG, code).analyses
+                analyses.run_pass("enter_ssa", enter_ssa, dom_graphs, basename)
+                # The def-use chains are built once, then kept updated
+                # by the passes preserving them.
+                with Timing.time_pass("def_use"):
+                    analyses.get("def_use")
                 if ssa_graphs:
                     s = "{}.{}.enterssa.dot".format(basename, code.fdata.get_name())
                     print("SSA:", s)
                     code.print_dot(s, view=True)
                 if mode == Mode.OPTIM:
                     from TPoptim.OptimSSA import OptimSSA  # type: ignore[import]
-                    OptimSSA(cast(CFG, code), debug=debug)
+                    # OptimSSA replaces statements through the CFG and
+                    # Block methods, which keep the def-use chains updated.
+                    analyses.run_pass("optim_ssa", OptimSSA, debug, preserves=["def_use"])
                     if ssa_graphs:
                         s = "{}.{}.optimssa.dot".format(basename, code.fdata.get_name())
                         print("SSA after optim:", s)
@@ -201,42 +350,117 @@ liveness file not found for {}.".format(form))
             else:
                 raise ValueError("Invalid allocation strategy:" + reg_alloc)
             if allocator:
-                allocator.prepare()
+                with Timing.time_pass("alloc_prepare"):
+                    allocator.prepare()
             if mode.value >= Mode.SSA.value:
                 from Lib.CFG import CFG  # type: ignore[import]
                 from TP05.ExitSSA import exit_ssa  # type: ignore[import]
-                exit_ssa(cast(CFG, code), reg_alloc == 'smart')
+                cast(CFG, code).analyses.run_pass("exit_ssa", exit_ssa, reg_alloc == 'smart')
                 comment += " with SSA"
             if allocator:
-                allocator.rewriteCode(code)
+                with Timing.time_pass("alloc_rewrite"):
+                    allocator.rewriteCode(code)
             if mode.value >= Mode.SSA.value and ssa_graphs:
                 s = "{}.{}.exitssa.dot".format(basename, code.fdata.get_name())
                 print("CFG after SSA:", s)
                 code.print_dot(s, view=True)
             from Lib.LinearCode import LinearCode  # type: ignore[import]
-            if isinstance(code, LinearCode):
-                code.print_code(output, comment=comment)
-            else:
-                from Lib.CFG import CFG  # type: ignore[import]
-                from TP04.LinearizeCFG import linearize  # type: ignore[import]
-                assert (isinstance(code, CFG))
-                code.print_code(output, linearize=linearize, comment=comment)
+            with Timing.time_pass("print_code"):
+                if isinstance(code, LinearCode):
+                    code.print_code(output, comment=comment)
+                else:
+                    from Lib.CFG import CFG  # type: ignore[import]
+                    from TP04.LinearizeCFG import linearize  # type: ignore[import]
+                    assert (isinstance(code, CFG))
+                    code.print_code(output, linearize=linearize, comment=comment)
+            Timing.set_function(None)
             if debug:
                 visitor3.printSymbolTable()
+    if cache is not None:
+        code_s = buffer.getvalue()
+        with open(output_name, 'w') if output_name else nullcontext(sys.stdout) as output:
+            output.write(code_s)
+        cache.put(cache_key, code_s)
 
 
-# command line management
-if __name__ == '__main__':
+def run_main(inputname, time_passes=None, **kwargs) -> None:
+    """
+    Run `main` on the file `inputname` and exit with the error code
+    corresponding to the exception raised, if any.
+    If `time_passes` is 'table' or 'json', report the time spent in each pass.
+    """
+    timer = Timing.start_timing() if time_passes else None
+    try:
+        main(inputname, **kwargs)
+    except MiniCUnsupportedError as e:
+        print(e)
+        exit(5)
+    except (MiniCInternalError, AllocationError):
+        print_exc()
+        exit(4)
+    finally:
+        if timer is not None:
+            Timing.stop_timing()
+            if time_passes == 'json':
+                timer.dump_json(sys.stderr)
+            else:
+                timer.print_table(sys.stderr)
+
+
+EXIT_CODES = {0: "ok", 1: "error", 2: "typing error", 3: "syntax error",
+              4: "internal error", 5: "unsupported", 6: "step limit exceeded"}
+
+
+def expand_filenames(patterns: List[str]) -> List[str]:
+    """Expand the glob patterns (with ** for nested directories) among `patterns`."""
+    filenames: List[str] = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            filenames.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            filenames.append(pattern)
+    return filenames
+
+
+def run_batch(filenames: List[str], compile_file, jobs: int | None) -> int:
+    """
+    Compile the files in parallel with `compile_file` (see `run_main`),
+    using `jobs` processes.
+    Print the output of each compilation, then a summary of the exit codes,
+    and return the highest exit code.
+    """
+    codes: Dict[int, List[str]] = dict()
+    with ProcessPoolExecutor(jobs) as pool:
+        results = [pool.submit(run_captured, compile_file, f) for f in filenames]
+        for filename, result in zip(filenames, results):
+            code, output = result.result()
+            print("==> {} <==".format(filename))
+            print(output, end='', flush=True)
+            codes.setdefault(code, []).append(filename)
+    print("\nSummary: {} files".format(len(filenames)))
+    for code, files in sorted(codes.items()):
+        print("  {} ({}): {}".format(EXIT_CODES.get(code, "exit code"), code, len(files)))
+        if code != 0:
+            for filename in files:
+                print("    " + filename)
+    return max(codes)
+
 
+# command line management
+def run(argv, served=False) -> None:
+    """
+    Run the compiler with the command-line arguments argv (without the
+    program name). `served` is True for the requests of a compile server.
+    """
     modes = valid_modes()
 
     parser = ArgumentParser(description='CAP/MIF08 MiniCC compiler')
 
-    parser.add_argument('filename', type=str,
-                        help='Source file.')
+    parser.add_argument('filename', type=str, nargs='*',
+                        help='Source files, or glob patterns (e.g. "TP04/tests/**/*.c"). '
+                        'Several files are compiled in parallel.')
     parser.add_argument('--mode', type=str,
                         choices=valid_modes(),
-                        required=True,
                         help='Operation to perform on the input program')
     parser.add_argument('--debug', action='store_true',
                         default=False,
@@ -244,6 +468,34 @@ if __name__ == '__main__':
     parser.add_argument('--disable-typecheck', action='store_true',
                         default=False,
                         help="Don't run the typechecker before evaluation or code generation")
+    parser.add_argument('--eval-engine', type=str,
+                        choices=['visitor', 'closures', 'vm'], default='visitor',
+                        help='How --mode eval runs the program: with MiniCInterpretVisitor, '
+                        'compiled to Python closures, or compiled to bytecode for a '
+                        'register VM')
+    parser.add_argument('--max-steps', type=int, default=None, metavar='N',
+                        help='Stop --mode eval after N steps (executed statements '
+                        'and blocks), with exit code 6')
+    parser.add_argument('--profile', action='store_true', default=False,
+                        help='Report the execution count and time of the hottest lines '
+                        'of the program evaluated by --mode eval, on stderr')
+    parser.add_argument('--time-passes', action='store_true',
+                        default=False,
+                        help='Report time and peak memory of each pass on stderr')
+    parser.add_argument('--time-passes-format', type=str,
+                        choices=['table', 'json'], default='table',
+                        help='Format of the --time-passes report')
+    parser.add_argument('--serve', type=str, metavar='SOCKET',
+                        help='Run as a compile server listening on the Unix socket SOCKET '
+                        '(see MiniCCClient.py). Restart it after modifying the compiler.')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='Number of processes compiling files in parallel '
+                        '(default: number of CPUs)')
+    parser.add_argument('--cache-dir', type=str,
+                        default=os.environ.get("MINICC_CACHE_DIR"),
+                        help='Directory where syntax trees and generated code are cached, '
+                        'keyed on the source, the options and the compiler sources '
+                        '(default: $MINICC_CACHE_DIR)')
 
     if "codegen-linear" in modes:
         parser.add_argument('--reg-alloc', type=str,
@@ -267,7 +519,20 @@ if __name__ == '__main__':
                             default=False,
                             help='Display dominance-related graphs (DT, DF).')
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.serve is not None:
+        if served:
+            parser.error("--serve cannot be sent to a compile server")
+        preload_modules()
+        serve(args.serve, partial(run, served=True))
+        return
+    if not args.filename or args.mode is None:
+        parser.error("the following arguments are required: filename, --mode")
+    filenames = expand_filenames(args.filename)
+    if not filenames:
+        parser.error("no source file matches " + " ".join(args.filename))
+    if (args.max_steps is not None or args.profile) and args.eval_engine != 'visitor':
+        parser.error("--max-steps and --profile require --eval-engine visitor")
     reg_alloc = args.reg_alloc if "codegen-linear" in modes else None
     to_stdout = args.stdout if "codegen-linear" in modes else False
     outfile = args.output if "codegen-linear" in modes else None
@@ -275,6 +540,9 @@ if __name__ == '__main__':
     ssa_graphs = args.ssa_graphs if "codegen-ssa" in modes else False
     dom_graphs = args.dom_graphs if "codegen-ssa" in modes else False
 
+    if outfile is not None and len(filenames) > 1:
+        print("error: --output cannot be used with several source files")
+        exit(1)
     if reg_alloc is None and "codegen" in args.mode:
         print("error: the following arguments is required: --reg-alloc")
         exit(1)
@@ -305,14 +573,20 @@ if __name__ == '__main__':
     else:
         raise ValueError("Invalid mode:" + args.mode)
 
-    try:
-        main(args.filename, reg_alloc, mode,
-             typecheck,
-             to_stdout, outfile, args.debug,
-             graphs, ssa_graphs, dom_graphs)
-    except MiniCUnsupportedError as e:
-        print(e)
-        exit(5)
-    except (MiniCInternalError, AllocationError):
-        print_exc()
-        exit(4)
+    time_passes = args.time_passes_format if args.time_passes else None
+    compile_file = partial(run_main, reg_alloc=reg_alloc, mode=mode,
+                           typecheck=typecheck, stdout=to_stdout,
+                           output_name=outfile, debug=args.debug,
+                           debug_graphs=graphs, ssa_graphs=ssa_graphs,
+                           dom_graphs=dom_graphs, cache_dir=args.cache_dir,
+                           eval_engine=args.eval_engine, max_steps=args.max_steps,
+                           profile=args.profile,
+                           time_passes=time_passes)
+    if len(filenames) == 1:
+        compile_file(filenames[0])
+    else:
+        exit(run_batch(filenames, compile_file, args.jobs))
+
+
+if __name__ == '__main__':
+    run(sys.argv[1:])
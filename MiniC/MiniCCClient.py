@@ -0,0 +1,19 @@
+#! /usr/bin/env python3
+"""
+Client for the MiniCC compile server.
+Usage:
+    python3 MiniCC.py --serve <socket> &
+    python3 MiniCCClient.py <socket> <arguments of MiniCC.py>
+"""
+
+import sys
+from Lib.Server import request
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__, file=sys.stderr)
+        exit(1)
+    code, output = request(sys.argv[1], sys.argv[2:])
+    sys.stdout.write(output)
+    exit(code)
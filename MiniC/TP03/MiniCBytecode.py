@@ -0,0 +1,402 @@
+# Evaluation of MiniC files by compilation to bytecode for a register VM
+#
+# Evaluation engine for --mode eval, with the same semantics as
+# MiniCInterpretVisitor.
+#
+# The program is compiled to a flat array of instructions for a register
+# machine, then run by the dispatch loop of run().
+# Each instruction takes INSTR_SIZE integers: an opcode and up to three
+# operands, which are indices in the register file or jump targets.
+# The register file holds the variables, the constants of the program
+# and the temporaries of the expressions, so that a variable access
+# is a list indexing instead of a dictionary lookup.
+#
+# The parts left to write (variables, assignments, tests, loops and
+# modulo) are the same as in MiniCInterpretVisitor: compile them with
+# the instructions below, and execute MOD in run().
+from array import array
+from typing import Dict, List, Tuple, cast
+from antlr4.tree.Tree import ParseTreeVisitor
+from MiniCParser import MiniCParser
+from Lib.Errors import MiniCRuntimeError, MiniCInternalError
+from TP03.MiniCInterpretVisitor import MINIC_VALUE, div_rd_0
+
+# Opcodes, with their operands
+(HALT,              # -
+ MOVE,              # dst, src
+ ADD, SUB, MUL, DIV, MOD,  # dst, src1, src2
+ LT, LTEQ, GT, GTEQ, EQ, NEQ, AND, OR,  # dst, src1, src2
+ NOT, NEG,          # dst, src
+ JUMP,              # target
+ JUMP_IF_FALSE,     # src, target
+ PRINT_INT, PRINT_FLOAT, PRINT_BOOL, PRINT_STRING,  # src
+ CHECK_DEFINED,     # reg, constant register holding the variable name
+ ) = range(24)
+
+OPNAMES = ["HALT", "MOVE", "ADD", "SUB", "MUL", "DIV", "MOD",
+           "LT", "LTEQ", "GT", "GTEQ", "EQ", "NEQ", "AND", "OR",
+           "NOT", "NEG", "JUMP", "JUMP_IF_FALSE",
+           "PRINT_INT", "PRINT_FLOAT", "PRINT_BOOL", "PRINT_STRING",
+           "CHECK_DEFINED"]
+
+INSTR_SIZE = 4
+
+_BINARY_OPS = {MiniCParser.PLUS: ADD, MiniCParser.MINUS: SUB,
+               MiniCParser.MULT: MUL, MiniCParser.DIV: DIV, MiniCParser.MOD: MOD,
+               MiniCParser.LT: LT, MiniCParser.LTEQ: LTEQ,
+               MiniCParser.GT: GT, MiniCParser.GTEQ: GTEQ,
+               MiniCParser.EQ: EQ, MiniCParser.NEQ: NEQ}
+
+
+class _Undefined:
+    """Value of the variables that are used without being declared."""
+
+    def __repr__(self):
+        return "<undefined>"
+
+
+UNDEFINED = _Undefined()
+
+
+class Bytecode:
+    """A compiled program: instructions and initial register file."""
+
+    #: Instructions, INSTR_SIZE integers each
+    code: array
+    #: Initial content of the registers (constants, or UNDEFINED)
+    registers: List
+    #: Names of the registers, for debugging
+    names: List[str]
+
+    def __init__(self, code: array, registers: List, names: List[str]):
+        self.code = code
+        self.registers = registers
+        self.names = names
+
+    def __str__(self):
+        lines = []
+        for pc in range(0, len(self.code), INSTR_SIZE):
+            op = self.code[pc]
+            args = self.code[pc + 1:pc + INSTR_SIZE]
+            if op in (JUMP, JUMP_IF_FALSE):
+                shown = [self.names[args[0]], "@{}".format(args[1] // INSTR_SIZE)] \
+                    if op == JUMP_IF_FALSE else ["@{}".format(args[0] // INSTR_SIZE)]
+            else:
+                nb_args = {HALT: 0, MOVE: 2, NOT: 2, NEG: 2, CHECK_DEFINED: 2,
+                           PRINT_INT: 1, PRINT_FLOAT: 1, PRINT_BOOL: 1,
+                           PRINT_STRING: 1}.get(op, 3)
+                shown = [self.names[a] for a in args[:nb_args]]
+            lines.append("{:4}: {} {}".format(pc // INSTR_SIZE, OPNAMES[op],
+                                               ", ".join(shown)))
+        return "\n".join(lines)
+
+
+# Derives from ParseTreeVisitor rather than MiniCVisitor, whose visit
+# methods return None (see MiniCClosureInterpreter).
+class MiniCBytecodeCompiler(ParseTreeVisitor):
+    """
+    Compile a program to :py:class:`Bytecode`. Visiting an expression
+    emits its instructions and returns the register holding its value.
+    """
+
+    def __init__(self):
+        self._code = array('i')
+        self._registers: List = []
+        self._names: List[str] = []
+        self._variables: Dict[str, int] = dict()
+        self._declared: set = set()
+        self._constants: Dict[Tuple[type, MINIC_VALUE], int] = dict()
+        self._free_temps: List[int] = []
+        self._temps: set = set()
+        # Position of the last instruction writing a temporary
+        self._last_def = -1
+        self.has_main = False
+
+    def get_bytecode(self) -> Bytecode:
+        return Bytecode(self._code, self._registers, self._names)
+
+    def _expr(self, tree) -> int:
+        """Compile the expression `tree`, and return the register holding its value."""
+        assert tree is not None
+        reg = self.visit(tree)
+        if not isinstance(reg, int):
+            raise MiniCInternalError("No register for expression {}".format(tree.getText()))
+        return reg
+
+    def _stat(self, tree) -> None:
+        """Compile the statement (or block, or declarations) `tree`."""
+        assert tree is not None
+        self.visit(tree)
+
+    def _ids(self, tree) -> List[str]:
+        """Return the identifiers of the list `tree`."""
+        assert tree is not None
+        return cast(List[str], self.visit(tree))
+
+    # register file
+
+    def _new_register(self, name: str, value) -> int:
+        self._registers.append(value)
+        self._names.append(name)
+        return len(self._registers) - 1
+
+    def _variable(self, name: str) -> int:
+        if name not in self._variables:
+            self._variables[name] = self._new_register(name, UNDEFINED)
+        return self._variables[name]
+
+    def _constant(self, value: MINIC_VALUE) -> int:
+        # The type is part of the key: 1, 1.0 and true are different constants.
+        key = (type(value), value)
+        if key not in self._constants:
+            self._constants[key] = self._new_register(repr(value), value)
+        return self._constants[key]
+
+    def _new_temp(self) -> int:
+        if self._free_temps:
+            return self._free_temps.pop()
+        reg = self._new_register("t{}".format(len(self._temps)), None)
+        self._temps.add(reg)
+        return reg
+
+    def _release(self, reg: int) -> None:
+        if reg in self._temps:
+            self._free_temps.append(reg)
+
+    # instructions
+
+    def _emit(self, op: int, a: int = 0, b: int = 0, c: int = 0) -> int:
+        """Emit an instruction, and return its position."""
+        pos = len(self._code)
+        self._code.extend((op, a, b, c))
+        return pos
+
+    def _emit_def(self, op: int, *args: int) -> int:
+        """Emit an instruction computing a new temporary, and return it."""
+        for arg in args:
+            self._release(arg)
+        dst = self._new_temp()
+        self._last_def = self._emit(op, dst, *args)
+        return dst
+
+    def _here(self) -> int:
+        return len(self._code)
+
+    def _patch_target(self, pos: int, target: int) -> None:
+        op = self._code[pos]
+        self._code[pos + (1 if op == JUMP else 2)] = target
+
+    # visitors for variable declarations
+
+    def visitVarDecl(self, ctx) -> None:
+        # Emit the initialisation of all variables (in self._declared)
+        type_str = ctx.typee().getText()
+        raise NotImplementedError()
+
+    def visitIdList(self, ctx) -> List[str]:
+        raise NotImplementedError()
+
+    def visitIdListBase(self, ctx) -> List[str]:
+        return [ctx.ID().getText()]
+
+    # visitors for atoms --> register
+
+    def visitParExpr(self, ctx) -> int:
+        return self._expr(ctx.expr())
+
+    def visitIntAtom(self, ctx) -> int:
+        return self._constant(int(ctx.getText()))
+
+    def visitFloatAtom(self, ctx) -> int:
+        return self._constant(float(ctx.getText()))
+
+    def visitBooleanAtom(self, ctx) -> int:
+        return self._constant(ctx.getText() == "true")
+
+    def visitIdAtom(self, ctx) -> int:
+        # Variables used without being declared (only possible without
+        # typechecking) are checked with CHECK_DEFINED
+        raise NotImplementedError()
+
+    def visitStringAtom(self, ctx) -> int:
+        return self._constant(ctx.getText()[1:-1])  # Remove the ""
+
+    # visit expressions
+
+    def visitAtomExpr(self, ctx) -> int:
+        return self._expr(ctx.atom())
+
+    def _binary(self, ctx, op: int) -> int:
+        lval = self._expr(ctx.expr(0))
+        rval = self._expr(ctx.expr(1))
+        return self._emit_def(op, lval, rval)
+
+    def visitOrExpr(self, ctx) -> int:
+        return self._binary(ctx, OR)
+
+    def visitAndExpr(self, ctx) -> int:
+        return self._binary(ctx, AND)
+
+    def _binary_myop(self, ctx, kind: str) -> int:
+        assert ctx.myop is not None
+        if ctx.myop.type not in _BINARY_OPS:
+            raise MiniCInternalError(
+                "Unknown {} operator '{}'".format(kind, ctx.myop))
+        return self._binary(ctx, _BINARY_OPS[ctx.myop.type])
+
+    def visitEqualityExpr(self, ctx) -> int:
+        return self._binary_myop(ctx, "equality")
+
+    def visitRelationalExpr(self, ctx) -> int:
+        return self._binary_myop(ctx, "comparison")
+
+    def visitAdditiveExpr(self, ctx) -> int:
+        return self._binary_myop(ctx, "additive")
+
+    def visitMultiplicativeExpr(self, ctx) -> int:
+        return self._binary_myop(ctx, "multiplicative")
+
+    def visitNotExpr(self, ctx) -> int:
+        return self._emit_def(NOT, self._expr(ctx.expr()))
+
+    def visitUnaryMinusExpr(self, ctx) -> int:
+        return self._emit_def(NEG, self._expr(ctx.expr()))
+
+    # visit statements
+
+    def _print(self, ctx, op: int) -> None:
+        val = self._expr(ctx.expr())
+        self._release(val)
+        self._emit(op, val)
+
+    def visitPrintlnintStat(self, ctx) -> None:
+        self._print(ctx, PRINT_INT)
+
+    def visitPrintlnfloatStat(self, ctx) -> None:
+        self._print(ctx, PRINT_FLOAT)
+
+    def visitPrintlnboolStat(self, ctx) -> None:
+        self._print(ctx, PRINT_BOOL)
+
+    def visitPrintlnstringStat(self, ctx) -> None:
+        self._print(ctx, PRINT_STRING)
+
+    def visitAssignStat(self, ctx) -> None:
+        raise NotImplementedError()
+
+    def visitIfStat(self, ctx) -> None:
+        raise NotImplementedError()
+
+    def visitWhileStat(self, ctx) -> None:
+        raise NotImplementedError()
+
+    # TOPLEVEL
+    def visitProgRule(self, ctx) -> None:
+        self.visitChildren(ctx)
+        if not self.has_main:
+            # A program without a main function is compilable (hence
+            # it's not a typing error per se), but not executable,
+            # hence we consider it a runtime error.
+            raise MiniCRuntimeError("No main function in file")
+        self._emit(HALT)
+
+    # Compile a function: ignore if non main!
+    def visitFuncDef(self, ctx) -> None:
+        funname = ctx.ID().getText()
+        if funname == "main":
+            self.has_main = True
+            self._stat(ctx.vardecl_l())
+            self._stat(ctx.block())
+
+
+def run(bytecode: Bytecode) -> None:
+    """Execute `bytecode`."""
+    # Lists are faster to index than arrays
+    code = bytecode.code.tolist()
+    regs = list(bytecode.registers)
+    pc = 0
+    # Most frequent instructions first
+    while True:
+        op = code[pc]
+        if op == MOVE:
+            regs[code[pc + 1]] = regs[code[pc + 2]]
+        elif op == JUMP_IF_FALSE:
+            if not regs[code[pc + 1]]:
+                pc = code[pc + 2]
+                continue
+        elif op == JUMP:
+            pc = code[pc + 1]
+            continue
+        elif op == ADD:
+            left = regs[code[pc + 2]]
+            right = regs[code[pc + 3]]
+            if isinstance(left, str) or isinstance(right, str):
+                regs[code[pc + 1]] = '{}{}'.format(left, right)
+            else:
+                regs[code[pc + 1]] = left + right
+        elif op == SUB:
+            regs[code[pc + 1]] = regs[code[pc + 2]] - regs[code[pc + 3]]
+        elif op == LT:
+            regs[code[pc + 1]] = regs[code[pc + 2]] < regs[code[pc + 3]]
+        elif op == MUL:
+            regs[code[pc + 1]] = regs[code[pc + 2]] * regs[code[pc + 3]]
+        elif op == EQ:
+            regs[code[pc + 1]] = regs[code[pc + 2]] == regs[code[pc + 3]]
+        elif op == NEQ:
+            regs[code[pc + 1]] = regs[code[pc + 2]] != regs[code[pc + 3]]
+        elif op == LTEQ:
+            regs[code[pc + 1]] = regs[code[pc + 2]] <= regs[code[pc + 3]]
+        elif op == GT:
+            regs[code[pc + 1]] = regs[code[pc + 2]] > regs[code[pc + 3]]
+        elif op == GTEQ:
+            regs[code[pc + 1]] = regs[code[pc + 2]] >= regs[code[pc + 3]]
+        elif op == DIV:
+            left = regs[code[pc + 2]]
+            right = regs[code[pc + 3]]
+            if right == 0:
+                raise MiniCRuntimeError("Division by 0")
+            if isinstance(left, int):
+                regs[code[pc + 1]] = div_rd_0(left, right)
+            else:
+                regs[code[pc + 1]] = left / right
+        elif op == MOD:
+            # TODO : interpret modulo
+            raise NotImplementedError()
+        elif op == AND:
+            regs[code[pc + 1]] = regs[code[pc + 2]] & regs[code[pc + 3]]
+        elif op == OR:
+            regs[code[pc + 1]] = regs[code[pc + 2]] | regs[code[pc + 3]]
+        elif op == NOT:
+            regs[code[pc + 1]] = not regs[code[pc + 2]]
+        elif op == NEG:
+            regs[code[pc + 1]] = -regs[code[pc + 2]]
+        elif op == PRINT_INT or op == PRINT_STRING:
+            print(regs[code[pc + 1]])
+        elif op == PRINT_FLOAT:
+            val = regs[code[pc + 1]]
+            if isinstance(val, float):
+                val = "%.2f" % val
+            print(val)
+        elif op == PRINT_BOOL:
+            print('1' if regs[code[pc + 1]] else '0')
+        elif op == CHECK_DEFINED:
+            if regs[code[pc + 1]] is UNDEFINED:
+                raise MiniCInternalError(
+                    "Undefined variable {}".format(regs[code[pc + 2]]))
+        elif op == HALT:
+            return
+        else:
+            raise MiniCInternalError("Unknown opcode {}".format(op))
+        pc += INSTR_SIZE
+
+
+def compile_program(tree) -> Bytecode:
+    """Compile the program `tree` to bytecode."""
+    compiler = MiniCBytecodeCompiler()
+    compiler.visit(tree)
+    return compiler.get_bytecode()
+
+
+def interpret(tree) -> None:
+    """Evaluate the program `tree` with the bytecode VM."""
+    run(compile_program(tree))
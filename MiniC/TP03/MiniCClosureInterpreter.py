@@ -0,0 +1,260 @@
+# Faster evaluation of MiniC files, by compilation to Python closures
+#
+# Evaluation engine for --mode eval, with the same semantics as
+# MiniCInterpretVisitor.
+#
+# Instead of visiting the tree each time a statement is executed, this
+# visitor visits each node once and returns a Python closure executing
+# it: expressions are compiled to functions returning their value,
+# statements to functions returning None. Constants are parsed and
+# operators resolved at compilation time, so a loop body runs without
+# any visitor dispatch.
+#
+# The parts left to write (variables, assignments, tests, loops and
+# modulo) are the same as in MiniCInterpretVisitor, with the code
+# returned in a closure.
+from typing import Any, Callable, Dict, List, cast
+from antlr4.tree.Tree import ParseTreeVisitor
+from MiniCParser import MiniCParser
+from Lib.Errors import MiniCRuntimeError, MiniCInternalError
+from TP03.MiniCInterpretVisitor import MINIC_VALUE, div_rd_0
+
+# Compiled expression, returning the value of the expression
+# (a MINIC_VALUE, whose type was checked by the typer: Any for operators)
+Expr = Callable[[], Any]
+# Compiled statement
+Stat = Callable[[], None]
+
+
+def _sequence(stats: List[Stat]) -> Stat:
+    """Return the code executing the statements `stats` in order."""
+    if len(stats) == 1:
+        return stats[0]
+
+    def run() -> None:
+        for stat in stats:
+            stat()
+    return run
+
+
+# The visit methods return closures, not the None of the generated
+# MiniCVisitor: derive from ParseTreeVisitor so that they are not
+# overrides with an incompatible type (nodes without a visit method
+# are visited with visitChildren, as with MiniCVisitor).
+class MiniCClosureCompiler(ParseTreeVisitor):
+
+    _memory: Dict[str, MINIC_VALUE]
+
+    def __init__(self):
+        self._memory = dict()  # store all variable ids and values.
+        self.has_main = False
+
+    def _expr(self, tree) -> Expr:
+        """Compile the expression `tree`."""
+        assert tree is not None
+        return cast(Expr, self.visit(tree))
+
+    def _stat(self, tree) -> Stat:
+        """Compile the statement (or block, or declarations) `tree`."""
+        assert tree is not None
+        return cast(Stat, self.visit(tree))
+
+    # visitors for variable declarations
+
+    def visitVarDecl(self, ctx) -> Stat:
+        # Return the code initialising all variables in self._memory
+        type_str = ctx.typee().getText()
+        raise NotImplementedError()
+
+    def visitVarDeclList(self, ctx) -> Stat:
+        return _sequence([self._stat(decl) for decl in ctx.vardecl()])
+
+    def _ids(self, tree) -> List[str]:
+        """Return the identifiers of the list `tree`."""
+        assert tree is not None
+        return cast(List[str], self.visit(tree))
+
+    def visitIdList(self, ctx) -> List[str]:
+        raise NotImplementedError()
+
+    def visitIdListBase(self, ctx) -> List[str]:
+        return [ctx.ID().getText()]
+
+    # visitors for atoms --> value
+
+    def visitParExpr(self, ctx) -> Expr:
+        return self._expr(ctx.expr())
+
+    def visitIntAtom(self, ctx) -> Expr:
+        value = int(ctx.getText())
+        return lambda: value
+
+    def visitFloatAtom(self, ctx) -> Expr:
+        value = float(ctx.getText())
+        return lambda: value
+
+    def visitBooleanAtom(self, ctx) -> Expr:
+        value = ctx.getText() == "true"
+        return lambda: value
+
+    def visitIdAtom(self, ctx) -> Expr:
+        raise NotImplementedError()
+
+    def visitStringAtom(self, ctx) -> Expr:
+        value = ctx.getText()[1:-1]  # Remove the ""
+        return lambda: value
+
+    # visit expressions
+
+    def visitAtomExpr(self, ctx) -> Expr:
+        return self._expr(ctx.atom())
+
+    def visitOrExpr(self, ctx) -> Expr:
+        lval = self._expr(ctx.expr(0))
+        rval = self._expr(ctx.expr(1))
+        return lambda: lval() | rval()
+
+    def visitAndExpr(self, ctx) -> Expr:
+        lval = self._expr(ctx.expr(0))
+        rval = self._expr(ctx.expr(1))
+        return lambda: lval() & rval()
+
+    def visitEqualityExpr(self, ctx) -> Expr:
+        assert ctx.myop is not None
+        lval = self._expr(ctx.expr(0))
+        rval = self._expr(ctx.expr(1))
+        if ctx.myop.type == MiniCParser.EQ:
+            return lambda: lval() == rval()
+        else:
+            return lambda: lval() != rval()
+
+    def visitRelationalExpr(self, ctx) -> Expr:
+        assert ctx.myop is not None
+        lval = self._expr(ctx.expr(0))
+        rval = self._expr(ctx.expr(1))
+        if ctx.myop.type == MiniCParser.LT:
+            return lambda: lval() < rval()
+        elif ctx.myop.type == MiniCParser.LTEQ:
+            return lambda: lval() <= rval()
+        elif ctx.myop.type == MiniCParser.GT:
+            return lambda: lval() > rval()
+        elif ctx.myop.type == MiniCParser.GTEQ:
+            return lambda: lval() >= rval()
+        else:
+            raise MiniCInternalError(
+                "Unknown comparison operator '%s'" % ctx.myop
+            )
+
+    def visitAdditiveExpr(self, ctx) -> Expr:
+        assert ctx.myop is not None
+        lval = self._expr(ctx.expr(0))
+        rval = self._expr(ctx.expr(1))
+        if ctx.myop.type == MiniCParser.PLUS:
+            def add():
+                left, right = lval(), rval()
+                if isinstance(left, str) or isinstance(right, str):
+                    return '{}{}'.format(left, right)
+                return left + right
+            return add
+        elif ctx.myop.type == MiniCParser.MINUS:
+            return lambda: lval() - rval()
+        else:
+            raise MiniCInternalError(
+                "Unknown additive operator '%s'" % ctx.myop)
+
+    def visitMultiplicativeExpr(self, ctx) -> Expr:
+        assert ctx.myop is not None
+        lval = self._expr(ctx.expr(0))
+        rval = self._expr(ctx.expr(1))
+        if ctx.myop.type == MiniCParser.MULT:
+            return lambda: lval() * rval()
+        elif ctx.myop.type == MiniCParser.DIV:
+            def div():
+                left, right = lval(), rval()
+                if right == 0:
+                    raise MiniCRuntimeError("Division by 0")
+                if isinstance(left, int):
+                    return div_rd_0(left, right)
+                return left / right
+            return div
+        elif ctx.myop.type == MiniCParser.MOD:
+            # TODO : compile modulo
+            raise NotImplementedError()
+        else:
+            raise MiniCInternalError(
+                "Unknown multiplicative operator '%s'" % ctx.myop)
+
+    def visitNotExpr(self, ctx) -> Expr:
+        val = self._expr(ctx.expr())
+        return lambda: not val()
+
+    def visitUnaryMinusExpr(self, ctx) -> Expr:
+        val = self._expr(ctx.expr())
+        return lambda: -val()
+
+    # visit statements
+
+    def visitPrintlnintStat(self, ctx) -> Stat:
+        val = self._expr(ctx.expr())
+        return lambda: print(val())
+
+    def visitPrintlnfloatStat(self, ctx) -> Stat:
+        val = self._expr(ctx.expr())
+
+        def run() -> None:
+            value = val()
+            if isinstance(value, float):
+                value = "%.2f" % value
+            print(value)
+        return run
+
+    def visitPrintlnboolStat(self, ctx) -> Stat:
+        val = self._expr(ctx.expr())
+        return lambda: print('1' if val() else '0')
+
+    def visitPrintlnstringStat(self, ctx) -> Stat:
+        val = self._expr(ctx.expr())
+        return lambda: print(val())
+
+    def visitAssignStat(self, ctx) -> Stat:
+        raise NotImplementedError()
+
+    def visitIfStat(self, ctx) -> Stat:
+        raise NotImplementedError()
+
+    def visitWhileStat(self, ctx) -> Stat:
+        raise NotImplementedError()
+
+    def visitStat(self, ctx) -> Stat:
+        return self._stat(ctx.getChild(0))
+
+    def visitStat_block(self, ctx) -> Stat:
+        if ctx.block() is not None:
+            return self._stat(ctx.block())
+        return self._stat(ctx.stat())
+
+    def visitStatList(self, ctx) -> Stat:
+        return _sequence([self._stat(stat) for stat in ctx.stat()])
+
+    # TOPLEVEL
+    def visitProgRule(self, ctx) -> Stat:
+        functions = [self._stat(f) for f in ctx.function()]
+        if not self.has_main:
+            # A program without a main function is compilable (hence
+            # it's not a typing error per se), but not executable,
+            # hence we consider it a runtime error.
+            raise MiniCRuntimeError("No main function in file")
+        return _sequence(functions)
+
+    # Compile a function: ignore if non main!
+    def visitFuncDef(self, ctx) -> Stat:
+        funname = ctx.ID().getText()
+        if funname != "main":
+            return lambda: None
+        self.has_main = True
+        return _sequence([self._stat(ctx.vardecl_l()), self._stat(ctx.block())])
+
+
+def interpret(tree) -> None:
+    """Evaluate the program `tree` by compiling it to closures."""
+    MiniCClosureCompiler()._stat(tree)()
@@ -7,6 +7,11 @@ from Lib.Errors import MiniCRuntimeError, MiniCInternalError
 MINIC_VALUE = int | str | bool | float | List['MINIC_VALUE']
 
 
+def div_rd_0(a: int, b: int) -> int:
+    """Division rounded towards 0, as in C (integer division in Python rounds down)."""
+    return -(-a // b) if (a < 0) ^ (b < 0) else a // b
+
+
 class MiniCInterpretVisitor(MiniCVisitor):
 
     _memory: Dict[str, MINIC_VALUE]
@@ -114,8 +119,8 @@ class MiniCInterpretVisitor(MiniCVisitor):
         elif ctx.myop.type == MiniCParser.DIV:
             if rval == 0:
                 raise MiniCRuntimeError("Division by 0")
-            if isinstance(lval, int):
-                return lval // rval
+            if isinstance(lval, int) and isinstance(rval, int):
+                return div_rd_0(lval, rval)
             else:
                 return lval / rval
         elif ctx.myop.type == MiniCParser.MOD:
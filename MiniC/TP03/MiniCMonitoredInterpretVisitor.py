@@ -0,0 +1,76 @@
+"""
+MiniCInterpretVisitor, with the --max-steps and --profile options of
+--mode eval.
+
+Each executed statement and each executed block (e.g. each iteration of
+a loop body) is one step: when more than max_steps steps are executed,
+MiniCStepLimitError is raised (MiniCC.py then exits with code 6).
+With profiling, the number of executions and the cumulative time of the
+statements are recorded for each line (the time of a statement includes
+the one of the statements it contains).
+"""
+import time
+from typing import Any, Dict, List
+from MiniCParser import MiniCParser
+from Lib.Errors import MiniCStepLimitError
+from TP03.MiniCInterpretVisitor import MiniCInterpretVisitor
+
+# Rules of the statements, whose executions are profiled
+STATEMENT_RULES = {MiniCParser.RULE_assignment, MiniCParser.RULE_if_stat,
+                   MiniCParser.RULE_while_stat, MiniCParser.RULE_print_stat}
+# Rules whose executions count as steps
+STEP_RULES = STATEMENT_RULES | {MiniCParser.RULE_stat_block}
+
+
+class MiniCMonitoredInterpretVisitor(MiniCInterpretVisitor):
+
+    def __init__(self, max_steps: int | None = None, profile: bool = False):
+        super().__init__()
+        self._max_steps = max_steps
+        self._profile = profile
+        self.steps = 0
+        # line -> number of executions, cumulative time
+        self.line_counts: Dict[int, int] = dict()
+        self.line_times: Dict[int, float] = dict()
+
+    def visit(self, tree: Any):
+        # tree is a context of the parser, a node of the AST or a token
+        rule = tree.getRuleIndex() if hasattr(tree, 'getRuleIndex') else -1
+        if rule not in STEP_RULES:
+            return tree.accept(self)
+        self.steps += 1
+        if self._max_steps is not None and self.steps > self._max_steps:
+            raise MiniCStepLimitError(
+                "Execution step limit exceeded ({} steps)".format(self._max_steps))
+        if not self._profile or rule not in STATEMENT_RULES:
+            return tree.accept(self)
+        line = tree.start.line
+        start = time.perf_counter()
+        try:
+            return tree.accept(self)
+        finally:
+            self.line_counts[line] = self.line_counts.get(line, 0) + 1
+            self.line_times[line] = (self.line_times.get(line, 0.)
+                                     + time.perf_counter() - start)
+
+    def visitChildren(self, node):
+        # Like ParseTreeVisitor.visitChildren, but through self.visit
+        # so that the statements of blocks are counted.
+        result = self.defaultResult()
+        for i in range(node.getChildCount()):
+            if not self.shouldVisitNextChild(node, result):
+                return result
+            result = self.aggregateResult(result, self.visit(node.getChild(i)))
+        return result
+
+    def print_profile(self, stream, source_lines: List[str], nb_lines: int = 10):
+        """Print the `nb_lines` lines with the highest cumulative time."""
+        print("{:>6} {:>10} {:>10}  {}".format("line", "count", "time (ms)", "source"),
+              file=stream)
+        hottest = sorted(self.line_times, key=lambda line: -self.line_times[line])
+        for line in hottest[:nb_lines]:
+            source = source_lines[line - 1].strip() if line <= len(source_lines) else ""
+            print("{:>6} {:>10} {:>10.2f}  {}".format(
+                line, self.line_counts[line], self.line_times[line] * 1000, source),
+                file=stream)
+        print("Total: {} steps".format(self.steps), file=stream)
@@ -0,0 +1,20 @@
+#include "printlib.h"
+
+int main(){
+  println_int(-7 / 2);
+  println_int(7 / -2);
+  println_int(-7 / -2);
+  println_int(-7 % 2);
+  println_int(7 % -2);
+  println_int(-7 % -2);
+  return 0;
+}
+
+// Rounded towards 0, as in C
+// EXPECTED
+// -3
+// -3
+// 3
+// -1
+// 1
+// -1
@@ -5,7 +5,6 @@ from Lib.LinearCode import LinearCode
 from Lib import RiscV
 from Lib.RiscV import Condition
 from Lib import Operands
-from antlr4.tree.Trees import Trees
 from Lib.Errors import MiniCInternalError, MiniCUnsupportedError
 
 """
@@ -113,7 +112,7 @@ class MiniCCodeGen3AVisitor(MiniCVisitor):
         c = Condition(ctx.myop.type)
         if self._debug:
             print("relational expression:")
-            print(Trees.toStringTree(ctx, None, self._parser))
+            print(ctx.toStringTree(recog=self._parser))
             print("Condition:", c)
         raise NotImplementedError() # TODO (Exercise 5)
 
@@ -150,7 +149,7 @@ class MiniCCodeGen3AVisitor(MiniCVisitor):
     def visitAssignStat(self, ctx) -> None:
         if self._debug:
             print("assign statement, rightexpression is:")
-            print(Trees.toStringTree(ctx.expr(), None, self._parser))
+            print(ctx.expr().toStringTree(recog=self._parser))
         expr_temp = self.visit(ctx.expr())
         name = ctx.ID().getText()
         self._current_function.add_instruction(RiscV.mv(self._symbol_table[name], expr_temp))
@@ -165,9 +164,9 @@ class MiniCCodeGen3AVisitor(MiniCVisitor):
     def visitWhileStat(self, ctx) -> None:
         if self._debug:
             print("while statement, condition is:")
-            print(Trees.toStringTree(ctx.expr(), None, self._parser))
+            print(ctx.expr().toStringTree(recog=self._parser))
             print("and block is:")
-            print(Trees.toStringTree(ctx.stat_block(), None, self._parser))
+            print(ctx.stat_block().toStringTree(recog=self._parser))
         raise NotImplementedError() # TODO (Exercise 5)
     # visit statements
 
@@ -175,7 +174,7 @@ class MiniCCodeGen3AVisitor(MiniCVisitor):
         expr_loc = self.visit(ctx.expr())
         if self._debug:
             print("print_int statement, expression is:")
-            print(Trees.toStringTree(ctx.expr(), None, self._parser))
+            print(ctx.expr().toStringTree(recog=self._parser))
         self._current_function.add_instruction_PRINTLN_INT(expr_loc)
 
     def visitPrintlnboolStat(self, ctx) -> None:
@@ -190,5 +189,5 @@ class MiniCCodeGen3AVisitor(MiniCVisitor):
 
     def visitStatList(self, ctx) -> None:
         for stat in ctx.stat():
-            self._current_function.add_comment(Trees.toStringTree(stat, None, self._parser))
+            self._current_function.add_comment(stat.toStringTree(recog=self._parser))
             self.visit(stat)
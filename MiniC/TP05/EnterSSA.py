@@ -65,6 +65,10 @@ def enter_ssa(cfg: CFG, dom_graphs=False, basename="prog") -> None:
 
     `dom_graphs` indicates if we have to print the domination graphs.
     `basename` is used for the names of the produced graphs.
+
+    The dominators, the dominator tree and the dominance frontier
+    can also be obtained from the analyses of the CFG
+    (e.g. ``cfg.analyses.get("DF")``, see :py:mod:`Lib.Analyses`).
     """
     # TODO implement this function (Lab 5a, Exercise 2)
     raise NotImplementedError("enter_ssa")
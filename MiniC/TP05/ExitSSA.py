@@ -38,11 +38,14 @@ def exit_ssa(cfg: CFG, is_smart: bool) -> None:
     for b in cfg.get_blocks():
         phis = cast(List[PhiNode], b._phis)  # Use cast for Pyright
         b._phis = []  # Remove all phi nodes in the block
+        cfg.block_changed(b)
         parents: List[Block] = b.get_in().copy()  # Copy as we modify it by adding blocks
         for parent in parents:
             moves = generate_moves_from_phis(phis, parent)
             # TODO Add the block containing 'moves' to 'cfg'
             # and update edges and jumps accordingly (Lab 5a, Exercise 6)
+            # (a terminator modified in place must be set again with
+            # set_terminator, see Lib.Terminator)
             raise NotImplementedError("exit_ssa")
 
 
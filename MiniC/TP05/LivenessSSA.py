@@ -1,4 +1,4 @@
-from typing import Dict, Set, Tuple
+from typing import Dict, MutableSet, Set, Tuple
 from Lib.Operands import Temporary
 from Lib.Statement import Statement, regset_to_string
 from Lib.CFG import Block, CFG
@@ -8,21 +8,31 @@ from Lib.PhiNode import PhiNode
 class LivenessSSA:
     """Liveness Analysis on a CFG under SSA Form."""
 
-    def __init__(self, cfg: CFG, debug=False):
+    def __init__(self, cfg: CFG, debug=False, bitsets: bool = False):
         self._cfg: CFG = cfg
         self._debug: bool = debug
+        # With bitsets, the sets of temporaries are Bitsets (see Lib.Bitset):
+        # they are much smaller, but adding and testing an element is
+        # 5 to 25 times slower than with sets (see benchmarks/bench_bitset.py).
+        self._bitsets: bool = bitsets
         # Temporary already propagated, by Block
-        self._seen: Dict[Block, Set[Temporary]] = dict()
+        self._seen: Dict[Block, MutableSet[Temporary]] = dict()
         # Live Temporary at outputs of Statement
-        self._liveout: Dict[Statement, Set[Temporary]] = dict()
+        self._liveout: Dict[Statement, MutableSet[Temporary]] = dict()
+
+    def empty_set(self) -> MutableSet[Temporary]:
+        """Return a new empty set of temporaries (a Bitset with bitsets)."""
+        if self._bitsets:
+            return self._cfg.fdata._pool.get_numbering().empty_set()
+        return set()
 
     def run(self) -> None:
         """Compute the liveness."""
         # Initialization
         for block in self._cfg.get_blocks():
-            self._seen[block] = set()
+            self._seen[block] = self.empty_set()
             for instr in block.get_all_statements():
-                self._liveout[instr] = set()
+                self._liveout[instr] = self.empty_set()
         # Start the use-def chains
         for var, uses in self.gather_uses().items():
             for block, pos, instr in uses:
@@ -65,23 +75,9 @@ class LivenessSSA:
         with additionnaly for each statement, the block of the statement and its position inside.
         Phi instructions have position None in their block, while a Terminaor is at the last
         position of its block.
+        It is computed from the def-use chains of the CFG (see :py:mod:`Lib.DefUse`).
         """
-        uses: Dict[Temporary, Set[Tuple[Block, int | None, Statement]]] = dict()
-        for block in self._cfg.get_blocks():
-            # Look inside the phi node
-            for instr in block._phis:
-                assert (isinstance(instr, PhiNode))
-                for var in instr.used().values():
-                    if isinstance(var, Temporary):
-                        var_uses = uses.get(var, set())
-                        uses[var] = var_uses.union({(block, None, instr)})
-            # Look inside the body and the terminator
-            for pos, instr in enumerate(block.get_body_and_terminator()):
-                for var in instr.used():
-                    if isinstance(var, Temporary):
-                        var_uses = uses.get(var, set())
-                        uses[var] = var_uses.union({(block, pos, instr)})
-        return uses
+        return self._cfg.analyses.get("def_use").uses()
 
     def conflict_on_phis(self) -> None:
         """Ensures that variables defined by phi instructions are in conflict with one-another."""
@@ -6,6 +6,7 @@ from Lib.Allocator import Allocator
 from Lib.FunctionData import FunctionData
 from Lib import RiscV
 from Lib.Graphes import Graph  # For Graph coloring utility functions
+from Lib.Timing import time_pass
 
 
 class SmartAllocator(Allocator):
@@ -46,14 +47,17 @@ class SmartAllocator(Allocator):
         - Associating temporaries with actual locations.
         """
         # Liveness analysis
-        self._liveness.run()
+        with time_pass("liveness"):
+            self._liveness.run()
         # Interference graph
-        self.build_interference_graph()
+        with time_pass("interference_graph"):
+            self.build_interference_graph()
         if self._debug_graphs:
             print("Printing the interference graph")
             self._igraph.print_dot(self._basename + "interference.dot")
         # Smart Allocation via graph coloring
-        self.smart_alloc()
+        with time_pass("coloring"):
+            self.smart_alloc()
 
     def build_interference_graph(self) -> None:
         """
@@ -70,6 +74,9 @@ class SmartAllocator(Allocator):
         # Iterate over self._liveness._liveout (dictionary containing all
         # live out temporaries for each instruction), and for each conflict use
         # self._igraph.add_edge((t1, t2)) to add the corresponding edge.
+        # The live out sets may be Bitsets (see Lib.Bitset): iterating over
+        # them gives the temporaries in increasing number, so each pair of
+        # conflicting temporaries can be added once, with t1 before t2.
         raise NotImplementedError("build_interference_graph (lab5)") # TODO
 
     def smart_alloc(self) -> None:
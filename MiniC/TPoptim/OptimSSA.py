@@ -107,7 +107,7 @@ class CondConstantPropagation:
         self.valueness = dict()
         self.executability = dict()
         self.debug = debug
-        self.all_vars = list(cfg.gather_defs().keys())
+        self.all_vars = cfg.analyses.get("def_use").variables()
         self.all_blocks = cfg.get_blocks()
 
         # Initialisation of valueness and executability
@@ -428,7 +428,7 @@ class CondConstantPropagation:
         # whence would have been deleted beforehand
         for block in self.all_blocks:
             if not self.is_executable(block):
-                del self.cfg._blocks[block.get_label()]
+                self.cfg.remove_block(block)
 
 
 def OptimSSA(cfg: CFG, debug: bool) -> None:
@@ -0,0 +1,80 @@
+#! /usr/bin/env python3
+"""
+Benchmark of Lib.Bitset against Python sets of temporaries, which is why
+TP05.LivenessSSA uses sets by default, and bitsets only with bitsets=True.
+
+For each number of temporaries, NB_SETS sets are filled with a random
+tenth of the temporaries as the liveness analysis does it (``in``, then
+``add`` when absent), then unioned two by two, as a dataflow analysis on
+sets would do. The memory taken by the sets is measured with tracemalloc,
+during another filling.
+Usage:
+    python3 benchmarks/bench_bitset.py [NB_TEMPORARIES ...]
+"""
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, List, MutableSet, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from Lib.Operands import Temporary, TemporaryPool  # noqa: E402
+
+SIZES = [100, 1000, 10000, 100000]
+NB_SETS = 200
+
+
+def fill(new_set: Callable[[], MutableSet[Temporary]],
+         samples: List[List[Temporary]]) -> List[MutableSet[Temporary]]:
+    sets = []
+    for sample in samples:
+        s = new_set()
+        for temp in sample:
+            if temp not in s:
+                s.add(temp)
+        sets.append(s)
+    return sets
+
+
+def measure(new_set: Callable[[], MutableSet[Temporary]],
+            samples: List[List[Temporary]]) -> Tuple[float, float, int]:
+    """
+    Return the time to fill the sets, the time to union them,
+    and the memory they take (in bytes).
+    """
+    start = time.perf_counter()
+    sets = fill(new_set, samples)
+    fill_time = time.perf_counter() - start
+    start = time.perf_counter()
+    unions = [s1 | s2 for s1, s2 in zip(sets, sets[1:])]
+    union_time = time.perf_counter() - start
+    del sets, unions
+    tracemalloc.start()
+    sets = fill(new_set, samples)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return fill_time, union_time, memory
+
+
+def main(sizes: List[int]) -> None:
+    print("{:>6} {:>23} {:>23} {:>23}".format(
+        "temps", "fill: set / bitset (ms)", "union: set / bitset (ms)",
+        "memory: set / bitset (kB)"))
+    for n in sizes:
+        rnd = random.Random(n)
+        pool = TemporaryPool()
+        temps = [pool.fresh_tmp() for _ in range(n)]
+        numbering = pool.get_numbering()
+        samples = [rnd.sample(temps, n // 10) for _ in range(NB_SETS)]
+        sets = measure(set, samples)
+        bitsets = measure(numbering.empty_set, samples)
+        print("{:>6} {:>11.2f} / {:<9.2f} {:>11.2f} / {:<9.2f} {:>11} / {:<9}".format(
+            n, sets[0] * 1000, bitsets[0] * 1000, sets[1] * 1000, bitsets[1] * 1000,
+            sets[2] // 1024, bitsets[2] // 1024), flush=True)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
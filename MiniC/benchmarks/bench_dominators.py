@@ -0,0 +1,143 @@
+#! /usr/bin/env python3
+"""
+Benchmark of the algorithms of Lib.Dominators.computeIdom, used to choose
+its default algorithm: semi-NCA, at least as fast as CHK at all sizes.
+The set-based computation of the dominators that Lib.Dominators used
+before (solving the equation system) is timed too, on the smaller CFGs.
+
+Two kinds of CFGs are generated, where all blocks are reachable from the
+start block:
+- "structured": nested ifs and loops, like the CFGs of MiniC functions;
+- "random": each block jumps to the next one and, half of the time,
+  to a random block.
+Usage:
+    python3 benchmarks/bench_dominators.py [SIZE ...]
+"""
+
+import os
+import random
+import sys
+import timeit
+from typing import Callable, Dict, List, Set, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from MiniCParser import MiniCParser  # noqa: E402
+from Lib.CFG import CFG, Block  # noqa: E402
+from Lib.FunctionData import FunctionData  # noqa: E402
+from Lib.Operands import Condition, Immediate  # noqa: E402
+from Lib.Statement import AbsoluteJump  # noqa: E402
+from Lib.Terminator import BranchingTerminator, Return, Terminator  # noqa: E402
+from Lib.Dominators import computeIdom  # noqa: E402
+
+SIZES = [5, 10, 30, 100, 300, 1000, 3000, 10000, 100000]
+# Largest CFGs on which the set-based computation is timed
+SETS_MAX_SIZE = 300
+
+
+def build_cfg(fdata: FunctionData, successors: List[List[int]]) -> CFG:
+    """Return the CFG whose i-th block jumps to the blocks successors[i]."""
+    cfg = CFG(fdata)
+    labels = [fdata.fresh_label("b") for _ in successors]
+    for label, succs in zip(labels, successors):
+        term: Terminator
+        if not succs:
+            term = Return()
+        elif len(succs) == 1:
+            term = AbsoluteJump(labels[succs[0]])
+        else:
+            term = BranchingTerminator(Condition(MiniCParser.LT), Immediate(0),
+                                       Immediate(1), labels[succs[0]],
+                                       labels[succs[1]])
+        cfg.add_block(Block(label, [], term))
+    cfg.set_start(labels[0])
+    for b in cfg.get_blocks():
+        for succ in cfg.out_blocks(b):
+            cfg.add_edge(b, succ)
+    return cfg
+
+
+def random_cfg(n: int, seed: int = 1) -> CFG:
+    rnd = random.Random(seed)
+    successors = [[i + 1] if rnd.random() < 0.5 else [i + 1, rnd.randrange(1, n)]
+                  for i in range(n - 1)]
+    return build_cfg(FunctionData("random"), successors + [[]])
+
+
+def structured_cfg(n: int, seed: int = 1) -> CFG:
+    rnd = random.Random(seed)
+    successors: List[List[int]] = []
+
+    def new_block() -> int:
+        successors.append([])
+        return len(successors) - 1
+
+    def statements(entry: int, size: int, depth: int) -> int:
+        """Fill about `size` blocks from `entry`, return the exit block."""
+        current = entry
+        while size > 0:
+            kind = rnd.random()
+            if kind < 0.4 or depth > 8:  # sequence
+                following = new_block()
+                successors[current] = [following]
+                current, size = following, size - 1
+            elif kind < 0.7:  # if-then-else
+                then_entry, else_entry, join = new_block(), new_block(), new_block()
+                successors[current] = [then_entry, else_entry]
+                then_size, else_size = rnd.randint(0, size // 3), rnd.randint(0, size // 3)
+                successors[statements(then_entry, then_size, depth + 1)] = [join]
+                successors[statements(else_entry, else_size, depth + 1)] = [join]
+                current, size = join, size - 3 - then_size - else_size
+            else:  # while loop
+                head, body, after = new_block(), new_block(), new_block()
+                successors[current] = [head]
+                successors[head] = [body, after]
+                body_size = rnd.randint(0, size // 2)
+                successors[statements(body, body_size, depth + 1)] = [head]
+                current, size = after, size - 3 - body_size
+        return current
+
+    statements(new_block(), n, 0)
+    return build_cfg(FunctionData("structured"), successors)
+
+
+def set_based_dominators(cfg: CFG) -> Dict[Block, Set[Block]]:
+    """The former computeDom, solving the equation system on sets."""
+    all_blocks: Set[Block] = set(cfg.get_blocks())
+    dominators: Dict[Block, Set[Block]] = {
+        b: all_blocks if b.get_in() else {b} for b in all_blocks}
+    while True:
+        new_dominators = {
+            b: {b}.union(set.intersection(*[dominators[p] for p in b.get_in()]))
+            if b.get_in() else {b} for b in all_blocks}
+        if new_dominators == dominators:
+            return dominators
+        dominators = new_dominators
+
+
+def best_time(function: Callable[[], object]) -> float:
+    """Return the best time of a call to `function`, in seconds."""
+    number, _ = timeit.Timer(function).autorange()
+    return min(timeit.repeat(function, number=number, repeat=3)) / number
+
+
+def main(sizes: List[int]) -> None:
+    print("{:>10} {:>8} {:>12} {:>12} {:>12}".format(
+        "cfg", "blocks", "sets (s)", "chk (s)", "semi-nca (s)"))
+    generators: List[Tuple[str, Callable[[int], CFG]]] = [
+        ("structured", structured_cfg), ("random", random_cfg)]
+    for name, generator in generators:
+        for n in sizes:
+            cfg = generator(n)
+            nb_blocks = len(cfg.get_blocks())
+            cfg.orders()  # Computed once for both algorithms
+            chk = best_time(lambda: computeIdom(cfg, 'chk'))
+            semi_nca = best_time(lambda: computeIdom(cfg, 'semi-nca'))
+            sets = ("{:>12.6f}".format(best_time(lambda: set_based_dominators(cfg)))
+                    if nb_blocks <= SETS_MAX_SIZE else "{:>12}".format("-"))
+            print("{:>10} {:>8} {} {:>12.6f} {:>12.6f}".format(
+                name, nb_blocks, sets, chk, semi_nca), flush=True)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,77 @@
+#! /usr/bin/env python3
+"""
+Benchmark of the traversals of Lib.Graphes.GeneralGraph, showing that
+they scale linearly: the time per vertex stays the same up to graphs of
+a million vertices.
+The list-based depth first search that Lib.Graphes used before, which
+is quadratic, is timed too on the smaller graphs.
+The graphs are random and connected, with 1.5 edges per vertex.
+Usage:
+    python3 benchmarks/bench_graphes.py [SIZE ...]
+"""
+
+import os
+import random
+import sys
+import time
+from typing import Any, Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from Lib.Graphes import Graph  # noqa: E402
+
+SIZES = [1000, 10000, 100000, 1000000]
+# Largest graphs on which the list-based traversal is timed
+LIST_MAX_SIZE = 10000
+
+
+def random_graph(n: int, seed: int = 1) -> Graph:
+    """Return a random connected graph with n vertices and 1.5 n edges."""
+    rnd = random.Random(seed)
+    graph = Graph()
+    graph.add_vertex(0)
+    for v in range(1, n):
+        graph.add_edge((v, rnd.randrange(v)))  # A spanning tree
+    for _ in range(n // 2):
+        v1, v2 = rnd.randrange(n), rnd.randrange(n)
+        if v1 != v2:
+            graph.add_edge((v1, v2))
+    return graph
+
+
+def list_based_dfs(graph: Graph, root: Any) -> List[Any]:
+    """The former dfs_traversal, with the visited vertices in a list."""
+    seen: List[Any] = []
+    todo: List[Any] = [root]
+    while todo:
+        current = todo.pop()
+        seen.append(current)
+        for neighbour in graph.graph_dict[current]:
+            if neighbour not in seen:
+                todo.append(neighbour)
+    return seen
+
+
+def duration(function: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main(sizes: List[int]) -> None:
+    print("{:>8} {:>12} {:>12} {:>12} {:>12}   (microseconds per vertex)".format(
+        "vertices", "list dfs", "dfs", "bfs", "components"))
+    for n in sizes:
+        graph = random_graph(n)
+        times = [
+            duration(lambda: list_based_dfs(graph, 0)) if n <= LIST_MAX_SIZE else None,
+            duration(lambda: graph.dfs_traversal(0)),
+            duration(lambda: graph.bfs_traversal(0)),
+            duration(lambda: graph.connected_components())]
+        print("{:>8} {}".format(n, " ".join(
+            "{:>12}".format("-") if t is None else "{:>12.3f}".format(t / n * 1e6)
+            for t in times)), flush=True)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,86 @@
+#! /usr/bin/env python3
+"""
+Benchmark of the maps keyed by statements, such as the live out sets of
+TP05.LivenessSSA, which is why statements are hashed by an identifier
+given at creation and compared by identity (see Lib.Statement).
+
+A function with 10 statements per block is generated, and a dictionary
+gets an entry for each of its statements. The same is timed with the
+statements wrapped in StructuralStatement, which hashes and compares
+them as Lib.Statement did before: a constant hash (the hash of their
+class), and equality of their fields.
+Usage:
+    python3 benchmarks/bench_statements.py [NB_STATEMENTS ...]
+"""
+
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from Lib import RiscV  # noqa: E402
+from Lib.CFG import CFG, Block, BlockInstr  # noqa: E402
+from Lib.FunctionData import FunctionData  # noqa: E402
+from Lib.Statement import AbsoluteJump, Statement  # noqa: E402
+from Lib.Terminator import Return, Terminator  # noqa: E402
+
+SIZES = [1000, 2000, 4000, 10000]
+# Largest functions on which the structural statements are timed
+STRUCTURAL_MAX_SIZE = 4000
+
+
+class StructuralStatement:
+    """A statement hashed and compared as Lib.Statement did before."""
+
+    def __init__(self, stat: Statement):
+        self.stat = stat
+        self.fields = {name: value for name, value in vars(stat).items()
+                       if name != '_uid'}
+
+    def __hash__(self):
+        return hash(type(self.stat))
+
+    def __eq__(self, other):
+        return type(other.stat) is type(self.stat) and other.fields == self.fields
+
+
+def statements(nb_statements: int) -> List[Statement]:
+    """Return the statements of a function of `nb_statements` statements."""
+    fdata = FunctionData("bench")
+    cfg = CFG(fdata)
+    temps = [fdata.fresh_tmp() for _ in range(nb_statements)]
+    labels = [fdata.fresh_label("b") for _ in range(nb_statements // 10)]
+    for i, label in enumerate(labels):
+        body: List[BlockInstr] = [
+            RiscV.add(temps[(i * 10 + k) % nb_statements],
+                      temps[(i * 10 + k + 1) % nb_statements],
+                      temps[(i * 10 + k + 2) % nb_statements]) for k in range(9)]
+        term: Terminator = AbsoluteJump(labels[i + 1]) if i + 1 < len(labels) else Return()
+        cfg.add_block(Block(label, body, term))
+    return [stat for block in cfg.get_blocks() for stat in block.get_all_statements()]
+
+
+def fill_time(keys: List[Any], new_value: Callable[[], Any]) -> float:
+    """Return the time to give a value to each key in a new dictionary."""
+    start = time.perf_counter()
+    values: Dict[Any, Any] = dict()
+    for key in keys:
+        values[key] = new_value()
+    return time.perf_counter() - start
+
+
+def main(sizes: List[int]) -> None:
+    print("{:>10} {:>14} {:>14}".format("statements", "identity (s)", "structural (s)"))
+    for n in sizes:
+        stats = statements(n)
+        identity = fill_time(stats, set)
+        structural = ("{:>14.4f}".format(
+            fill_time([StructuralStatement(s) for s in stats], set))
+            if n <= STRUCTURAL_MAX_SIZE else "{:>14}".format("-"))
+        print("{:>10} {:>14.4f} {}".format(n, identity, structural), flush=True)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -131,13 +131,13 @@ class TestCodeGen(TestExpectPragmas):
         self.remove(output_name)
         alloc_opt = '--reg-alloc=' + reg_alloc
         out_opt = '--output=' + output_name
-        cmd = [sys.executable, MINIC_COMPILE]
+        args = []
         if not DISABLE_CODEGEN:
-            cmd += [out_opt, alloc_opt]
-        cmd += MINICC_OPTS
-        cmd += [file]
-        result = self.run_command(cmd)
-        print(' '.join(cmd))
+            args += [out_opt, alloc_opt]
+        args += MINICC_OPTS
+        args += [file]
+        result = self.run_minicc(MINIC_COMPILE, args)
+        print(' '.join([sys.executable, MINIC_COMPILE] + args))
         print("Exited with status:", result.exitcode)
         print(result.output)
         if result.exitcode == 4:
@@ -0,0 +1,223 @@
+#! /usr/bin/env python3
+"""
+Tests of the command-line options of MiniCC.py that do not depend on
+the labs: batch compilation of several files, the compilation cache,
+the compile server, and the step limit and profile of the interpreter.
+Usage:
+    python3 -m pytest test_driver.py
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import pytest
+import test_expect_pragma
+from Lib.Server import request
+from test_expect_pragma import TestExpectPragmas
+
+HERE = os.path.dirname(os.path.realpath(__file__))
+MINICC = os.path.join(HERE, 'MiniCC.py')
+
+# Programs are run with the bytecode VM, without typechecking (a lab).
+PRINT_INT = os.path.join(HERE, 'TP03/tests/provided/examples/test_print_int.c')
+SYNTAX_ERROR = os.path.join(HERE, 'TP06/tests/provided/basic-functions/test_bool.c')
+EVAL_OPTS = ['--mode', 'eval', '--disable-typecheck', '--eval-engine', 'vm']
+
+# The programs below only use what the skeletons of the interpreters implement
+DIV_BY_ZERO = """\
+int main() {
+    println_int(1 / 0);
+    return 0;
+}
+"""
+
+THREE_PRINTS = """\
+int main() {
+    println_int(1);
+    println_int(2);
+    println_int(3);
+    return 0;
+}
+"""
+
+NEGATIVE_DIVISIONS = """\
+int main() {
+    println_int(-7 / 2);
+    println_int(7 / -2);
+    println_int(-7 / -2);
+    return 0;
+}
+"""
+
+
+def run_minicc(args):
+    """Run MiniCC.py with `args`, return its exit code and output."""
+    proc = subprocess.run([sys.executable, MINICC] + args, cwd=HERE, timeout=60,
+                          stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    return proc.returncode, proc.stdout.decode()
+
+
+def parse_batch_output(output):
+    """
+    Split the output of a batch compilation into the output of each file,
+    and the exit code of each file given by the summary.
+    """
+    body, summary = output.split("\nSummary: ", 1)
+    outputs = dict()
+    for chunk in re.split(r"^==> ", body, flags=re.MULTILINE)[1:]:
+        filename, file_output = chunk.split(" <==\n", 1)
+        outputs[filename] = file_output
+    codes = dict()
+    code = None
+    for line in summary.splitlines()[1:]:
+        match = re.match(r"^  \S.* \(([0-9]+)\): [0-9]+$", line)
+        if match:
+            code = int(match.group(1))
+        else:
+            codes[line.strip()] = code
+    return outputs, codes
+
+
+def run_minicc_passes(args):
+    """
+    Run MiniCC.py with `args` and --time-passes, return its exit code
+    and the names of the passes it ran.
+    """
+    proc = subprocess.run([sys.executable, MINICC, '--time-passes',
+                           '--time-passes-format', 'json'] + args,
+                          cwd=HERE, timeout=60,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    return proc.returncode, [p["name"] for p in json.loads(proc.stderr)]
+
+
+class TestDriver:
+
+    @pytest.fixture
+    def programs(self, tmp_path):
+        div = tmp_path / "div_by_zero.c"
+        div.write_text(DIV_BY_ZERO)
+        return [PRINT_INT, SYNTAX_ERROR, str(div)]
+
+    def test_batch_same_as_single_runs(self, programs):
+        singles = {f: run_minicc(EVAL_OPTS + [f]) for f in programs}
+        assert sorted(code for code, _ in singles.values()) == [0, 1, 3]
+        code, output = run_minicc(EVAL_OPTS + ['--jobs', '2'] + programs)
+        outputs, codes = parse_batch_output(output)
+        assert code == max(code for code, _ in singles.values())
+        assert outputs == {f: out for f, (_, out) in singles.items()}
+        # The summary lists the files with a non-zero exit code
+        assert codes == {f: code for f, (code, _) in singles.items() if code != 0}
+
+    def test_batch_glob_pattern(self, programs, tmp_path):
+        pattern = str(tmp_path / "*.c")
+        code, output = run_minicc(EVAL_OPTS + [pattern])
+        assert code == 1
+        # A single file: compiled directly, not as a batch
+        assert "Summary" not in output
+        assert output == run_minicc(EVAL_OPTS + [programs[2]])[1]
+
+    def test_cache_second_run_identical(self, tmp_path):
+        cache_dir = str(tmp_path / "cache")
+        args = ['--mode', 'codegen-linear', '--reg-alloc', 'naive',
+                '--cache-dir', cache_dir, PRINT_INT]
+        first = tmp_path / "first.s"
+        second = tmp_path / "second.s"
+        code, passes = run_minicc_passes(args + ['--output', str(first)])
+        assert code == 0
+        assert "codegen3a" in passes
+        code, passes = run_minicc_passes(args + ['--output', str(second)])
+        assert code == 0
+        # Served from the cache, without generating code again
+        assert passes == ["cache_lookup"]
+        assert second.read_bytes() == first.read_bytes()
+
+    @pytest.fixture
+    def server(self, tmp_path):
+        """Start a compile server, and return its socket."""
+        socket_path = str(tmp_path / "server.sock")
+        proc = subprocess.Popen([sys.executable, MINICC, '--serve', socket_path],
+                                cwd=HERE, stdout=subprocess.PIPE)
+        assert proc.stdout is not None
+        # Listening once it says so
+        proc.stdout.readline()
+        yield socket_path
+        proc.terminate()
+        proc.wait(timeout=60)
+
+    def test_server(self, server):
+        assert request(server, EVAL_OPTS + [PRINT_INT]) == run_minicc(EVAL_OPTS + [PRINT_INT])
+        code, output = request(server, ['--serve', server + "2"])
+        assert code == 2
+        assert "--serve cannot be sent to a compile server" in output
+
+    def test_without_server(self, tmp_path, monkeypatch):
+        # Compiled in a new process when the server does not answer
+        monkeypatch.setattr(test_expect_pragma, "MINICC_SERVER", str(tmp_path / "none.sock"))
+        result = TestExpectPragmas().run_minicc(MINICC, EVAL_OPTS + [PRINT_INT])
+        assert (result.exitcode, result.output) == run_minicc(EVAL_OPTS + [PRINT_INT])
+
+    @pytest.mark.parametrize("corrupt", [lambda data: data[:len(data) // 2],
+                                         lambda data: b"not marshal data"],
+                             ids=["truncated", "garbage"])
+    def test_corrupted_ast_cache(self, tmp_path, corrupt):
+        cache_dir = tmp_path / "cache"
+        args = EVAL_OPTS + ['--cache-dir', str(cache_dir), PRINT_INT]
+        expected = run_minicc(args)
+        entries = list(cache_dir.glob("**/*.ast"))
+        assert len(entries) == 1
+        data = entries[0].read_bytes()
+        entries[0].write_bytes(corrupt(data))
+        # A cache miss: the program is parsed again, and cached again
+        assert run_minicc(args) == expected
+        assert entries[0].read_bytes() == data
+
+    @pytest.mark.parametrize("max_steps, expected_code, expected_lines", [
+        (1, 6, 1),
+        (2, 6, 2),
+        (3, 0, 3),
+    ])
+    def test_max_steps(self, tmp_path, max_steps, expected_code, expected_lines):
+        prog = tmp_path / "three_prints.c"
+        prog.write_text(THREE_PRINTS)
+        code, output = run_minicc(['--mode', 'eval', '--disable-typecheck',
+                                   '--max-steps', str(max_steps), str(prog)])
+        assert code == expected_code
+        lines = output.splitlines()
+        assert lines[:expected_lines] == [str(i + 1) for i in range(expected_lines)]
+        if expected_code == 6:
+            assert lines[expected_lines:] == [
+                "Execution step limit exceeded ({} steps)".format(max_steps)]
+        else:
+            assert lines[expected_lines:] == []
+
+    @pytest.mark.parametrize('engine', ['visitor', 'closures', 'vm'])
+    def test_division_rounded_towards_zero(self, tmp_path, engine):
+        prog = tmp_path / "negative_divisions.c"
+        prog.write_text(NEGATIVE_DIVISIONS)
+        code, output = run_minicc(['--mode', 'eval', '--disable-typecheck',
+                                   '--eval-engine', engine, str(prog)])
+        assert (code, output.splitlines()) == (0, ["-3", "-3", "3"])
+
+    def test_profile(self, tmp_path):
+        prog = tmp_path / "three_prints.c"
+        prog.write_text(THREE_PRINTS)
+        code, output = run_minicc(['--mode', 'eval', '--disable-typecheck',
+                                   '--profile', str(prog)])
+        assert code == 0
+        lines = output.splitlines()
+        assert len(lines) == 8
+        assert lines[:3] == ["1", "2", "3"]
+        assert lines[3].split() == ["line", "count", "time", "(ms)", "source"]
+        # line, count, time, source of each statement, hottest first
+        rows = [re.fullmatch(r" *(\d+) +(\d+) +[0-9.]+  (.*)", line) for line in lines[4:-1]]
+        assert sorted(row.groups() for row in rows if row is not None) == [
+            (str(i + 2), "1", "println_int({});".format(i + 1)) for i in range(3)]
+        assert lines[-1] == "Total: 3 steps"
+
+    @pytest.mark.parametrize('option', [['--profile'], ['--max-steps', '10']])
+    def test_monitoring_requires_visitor(self, option):
+        code, output = run_minicc(EVAL_OPTS + option + [PRINT_INT])
+        assert code == 2
+        assert "--max-steps and --profile require --eval-engine visitor" in output
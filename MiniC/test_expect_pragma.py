@@ -4,6 +4,7 @@ import os
 import subprocess
 import sys
 import pytest
+from Lib.Server import request
 
 testinfo = collections.namedtuple(
     'testinfo',
@@ -11,6 +12,10 @@ testinfo = collections.namedtuple(
 default_testinfo = testinfo(
     exitcode=0, execcode=0, output='', linkargs=[], skip_test_expected=False)
 
+# Socket of a compile server (MiniCC.py --serve) to use instead of
+# starting a new compiler for each test.
+MINICC_SERVER = os.environ.get("MINICC_SERVER")
+
 
 def cat(filename):
     with open(filename, "rb") as f:
@@ -91,6 +96,24 @@ class TestExpectPragmas(object):
             return default_testinfo._replace(exitcode=status,
                                              output=output.decode())
 
+    def run_minicc(self, minicc, args):
+        """Run the compiler minicc (path to MiniCC.py) with the arguments
+        args, and return testinfo(exitcode=..., output=...) like run_command.
+
+        If MINICC_SERVER is set, send the arguments to the compile server
+        listening on this socket instead of starting a new process.
+        The server runs its own MiniCC.py, so other compilers are
+        still run in a new process, as well as the compilations the
+        server does not answer (e.g. it is not running).
+        """
+        if MINICC_SERVER and os.path.basename(minicc) == "MiniCC.py":
+            try:
+                status, output = request(MINICC_SERVER, args)
+                return default_testinfo._replace(exitcode=status, output=output)
+            except (ConnectionError, TimeoutError, FileNotFoundError):
+                pass
+        return self.run_command([sys.executable, minicc] + args)
+
     def skip_if_partial_match(self, actual, expect, ignore_error_message):
         if not ignore_error_message:
             return False
@@ -25,14 +25,17 @@ if 'TEST_FILES' in os.environ:
     ALL_FILES = glob.glob(os.environ['TEST_FILES'], recursive=True)
 MINIC_EVAL = os.path.join(IMPLEM_DIR, 'MiniCC.py')
 
+# Evaluation engines of --mode eval (--eval-engine)
+ENGINES = ['visitor', 'closures', 'vm']
+
 
 class TestInterpret(TestExpectPragmas):
 
-    def evaluate(self, file):
-        if not DISABLE_TYPECHECK:
-            return self.run_command([sys.executable, MINIC_EVAL, "--mode", "eval", file])
-        else:
-            return self.run_command([sys.executable, MINIC_EVAL, "--mode", "eval", "--disable-typecheck", file])
+    def evaluate(self, file, engine='visitor'):
+        args = ["--mode", "eval", "--eval-engine", engine]
+        if DISABLE_TYPECHECK:
+            args.append("--disable-typecheck")
+        return self.run_minicc(MINIC_EVAL, args + [file])
 
     # Not in test_expect_pragma to get assertion rewritting
     def assert_equal(self, actual, expected):
@@ -44,11 +47,12 @@ class TestInterpret(TestExpectPragmas):
         assert actual.execcode == expected.execcode, \
             "Exit code of the execution is incorrect"
 
+    @pytest.mark.parametrize('engine', ENGINES)
     @pytest.mark.parametrize('filename', ALL_FILES)
-    def test_eval(self, filename):
+    def test_eval(self, filename, engine):
         cat(filename)  # For diagnosis
         expect = self.get_expect(filename)
-        eval = self.evaluate(filename)
+        eval = self.evaluate(filename, engine)
         if expect:
             self.assert_equal(eval, expect)
 
@@ -0,0 +1,349 @@
+#! /usr/bin/env python3
+"""
+Unit tests of the parts of the library (Lib/) that do not depend on
+the labs.
+Usage:
+    python3 -m pytest test_lib.py
+"""
+
+from typing import AbstractSet, Dict, List, Set
+import random
+import pytest
+from MiniCParser import MiniCParser
+from Lib.CFG import CFG, Block
+from Lib.Dominators import (
+    computeDF, computeDom, computeDominatorTree, computeDT, computeIdom)
+from Lib.Errors import MiniCInternalError
+from Lib.FunctionData import FunctionData
+from Lib.Operands import Condition, Immediate
+from Lib.Statement import AbsoluteJump, Label, Statement
+from Lib import RiscV
+from Lib.Terminator import BranchingTerminator, Return
+
+
+def branch(label_then: Label, label_else: Label) -> BranchingTerminator:
+    return BranchingTerminator(Condition(MiniCParser.LT), Immediate(0),
+                               Immediate(1), label_then, label_else)
+
+
+def returning_blocks(fdata: FunctionData, nb_blocks: int) -> List[Block]:
+    """Return new blocks, ending with a Return terminator."""
+    return [Block(fdata.fresh_label("b"), [], Return()) for _ in range(nb_blocks)]
+
+
+def new_cfg(fdata: FunctionData, blocks: List[Block]) -> CFG:
+    """Return the CFG of `blocks`, starting with the first one, with their edges."""
+    cfg = CFG(fdata)
+    for b in blocks:
+        cfg.add_block(b)
+    cfg.set_start(blocks[0].get_label())
+    for b in blocks:
+        for succ in cfg.out_blocks(b):
+            cfg.add_edge(b, succ)
+    return cfg
+
+
+def cfg_of(successors: List[List[int]]) -> CFG:
+    """Return the CFG whose i-th block jumps to the blocks successors[i]."""
+    fdata = FunctionData("f")
+    blocks = returning_blocks(fdata, len(successors))
+    for block, succs in zip(blocks, successors):
+        labels = [blocks[i].get_label() for i in succs]
+        if len(labels) == 1:
+            block.set_terminator(AbsoluteJump(labels[0]))
+        elif len(labels) == 2:
+            block.set_terminator(branch(labels[0], labels[1]))
+    return new_cfg(fdata, blocks)
+
+
+def random_cfg(rnd: random.Random, size: int) -> CFG:
+    """Each block jumps to the next one and sometimes to another block."""
+    successors: List[List[int]] = [[i + 1] for i in range(size - 1)] + [[]]
+    for succs in successors:
+        other = rnd.randrange(size)
+        if rnd.random() < 0.5 and other not in succs:
+            succs.append(other)
+    return cfg_of(successors)
+
+
+def structured_cfg(rnd: random.Random, size: int) -> CFG:
+    """Nested ifs and while loops, like the CFGs of MiniC functions."""
+    successors: List[List[int]] = []
+
+    def new_block() -> int:
+        successors.append([])
+        return len(successors) - 1
+
+    def statements(current: int, size: int) -> int:
+        """Fill about `size` blocks from `current`, return the last one."""
+        while size > 0:
+            kind = rnd.random()
+            if kind < 0.3:  # sequence
+                successors[current] = [new_block()]
+                current, size = successors[current][0], size - 1
+            elif kind < 0.6:  # if-then-else
+                then_entry, else_entry, join = new_block(), new_block(), new_block()
+                successors[current] = [then_entry, else_entry]
+                then_size, else_size = rnd.randint(0, size // 3), rnd.randint(0, size // 3)
+                successors[statements(then_entry, then_size)] = [join]
+                successors[statements(else_entry, else_size)] = [join]
+                current, size = join, size - 3 - then_size - else_size
+            else:  # while loop
+                head, body, after = new_block(), new_block(), new_block()
+                successors[current] = [head]
+                successors[head] = [body, after]
+                body_size = rnd.randint(0, size // 2)
+                successors[statements(body, body_size)] = [head]
+                current, size = after, size - 3 - body_size
+        return current
+
+    statements(new_block(), size)
+    return cfg_of(successors)
+
+
+def dominators_by_definition(cfg: CFG) -> Dict[Block, AbstractSet[Block]]:
+    """
+    Solve Dom(b) = {b} | (intersection of Dom(p) for the predecessors p
+    of b), with Dom(b) = {b} for the start block and the blocks without
+    predecessors (the other blocks must be reachable from them).
+    """
+    blocks = set(cfg.get_blocks())
+    start = cfg.get_block(cfg.get_start())
+    roots = {b for b in blocks if b is start or not b.get_in()}
+    dominators: Dict[Block, Set[Block]] = {b: {b} if b in roots else blocks for b in blocks}
+    changed = True
+    while changed:
+        changed = False
+        for b in blocks - roots:
+            new = {b}.union(set.intersection(*[dominators[p] for p in b.get_in()]))
+            if new != dominators[b]:
+                dominators[b], changed = new, True
+    return dict(dominators)
+
+
+def nested_ifs_cfg(depth: int) -> CFG:
+    """
+    `depth` nested ifs without else: the i-th test jumps to the (i+1)-th
+    one (or to the innermost block) and to the i-th join block, which
+    jumps to the (i-1)-th join block. Blocks: tests, innermost, joins.
+    """
+    successors = [[i + 1, 2 * depth - i] for i in range(depth)]
+    successors.append([depth + 1])
+    successors.extend([i + 1] for i in range(depth + 1, 2 * depth))
+    return cfg_of(successors + [[]])
+
+
+def sample_cfgs(seed: int) -> List[CFG]:
+    rnd = random.Random(seed)
+    return [random_cfg(rnd, rnd.randint(1, 40)), structured_cfg(rnd, rnd.randint(1, 40))]
+
+
+class TestStatement:
+
+    def test_statements_compared_by_identity(self):
+        fdata = FunctionData("f")
+        t1, t2 = fdata.fresh_tmp(), fdata.fresh_tmp()
+        label = fdata.fresh_label("b")
+        pairs: List[List[Statement]] = [
+            [RiscV.mv(t1, t2), RiscV.mv(t1, t2)],
+            [AbsoluteJump(label), AbsoluteJump(label)],
+            [Return(), Return()],
+            [branch(label, label), branch(label, label)]]
+        for first, second in pairs:
+            assert str(first) == str(second)
+            assert first != second
+            assert first == first
+            assert len({first, second}) == 2
+            assert len({first: 1, second: 2}) == 2
+
+    def test_labels_compared_by_name(self):
+        assert Label("l") == Label("l")
+        assert Label("l") != Label("m")
+        assert len({Label("l"), Label("l")}) == 1
+        assert {Label("l"): 1}[Label("l")] == 1
+
+
+class TestCFG:
+
+    def test_terminator_modified_in_place(self):
+        fdata = FunctionData("f")
+        blocks = returning_blocks(fdata, 4)
+        term = branch(blocks[1].get_label(), blocks[2].get_label())
+        blocks[0].set_terminator(term)
+        cfg = new_cfg(fdata, blocks)
+        assert cfg.out_blocks(blocks[0]) == [blocks[1], blocks[2]]
+        assert cfg.orders().dfs_parent[blocks[3]] is None
+        version = cfg.get_version()
+        term.label_else = blocks[3].get_label()
+        # Reading the CFG has no side effect
+        assert cfg.out_blocks(blocks[0]) == [blocks[1], blocks[2]]
+        assert cfg.get_version() == version
+        # The change is taken into account once reported
+        blocks[0].set_terminator(term)
+        assert cfg.get_version() != version
+        assert cfg.out_blocks(blocks[0]) == [blocks[1], blocks[3]]
+        assert cfg.orders().dfs_parent[blocks[3]] is blocks[0]
+
+
+class TestAnalyses:
+
+    def test_structure_modified_outside_passes(self):
+        fdata = FunctionData("f")
+        blocks = returning_blocks(fdata, 2)
+        blocks[0].set_terminator(AbsoluteJump(blocks[1].get_label()))
+        cfg = new_cfg(fdata, blocks)
+        assert cfg.analyses.get("idom")[blocks[1]] is blocks[0]
+        # Insert a block between the two blocks, without run_pass
+        middle = Block(fdata.fresh_label("b"), [], AbsoluteJump(blocks[1].get_label()))
+        cfg.add_block(middle)
+        blocks[0].set_terminator(AbsoluteJump(middle.get_label()))
+        cfg.remove_edge(blocks[0], blocks[1])
+        cfg.add_edge(blocks[0], middle)
+        cfg.add_edge(middle, blocks[1])
+        assert not cfg.analyses.is_cached("idom")
+        assert cfg.analyses.get("idom")[blocks[1]] is middle
+        assert cfg.analyses.get("dominator_tree").idom(blocks[1]) is middle
+
+    def test_loops(self):
+        # b1 and b2 are the headers of nested loops, b5 loops on itself
+        fdata = FunctionData("f")
+        b = returning_blocks(fdata, 7)
+        b[0].set_terminator(AbsoluteJump(b[1].get_label()))
+        b[1].set_terminator(branch(b[2].get_label(), b[5].get_label()))
+        b[2].set_terminator(branch(b[3].get_label(), b[4].get_label()))
+        b[3].set_terminator(AbsoluteJump(b[2].get_label()))
+        b[4].set_terminator(AbsoluteJump(b[1].get_label()))
+        b[5].set_terminator(branch(b[5].get_label(), b[6].get_label()))
+        cfg = new_cfg(fdata, b)
+        outer, inner, self_loop = sorted(cfg.analyses.get("loops"),
+                                         key=lambda loop: b.index(loop.header))
+        assert outer.blocks == {b[1], b[2], b[3], b[4]}
+        assert inner.blocks == {b[2], b[3]}
+        assert self_loop.blocks == {b[5]}
+        assert (outer.parent, inner.parent, self_loop.parent) == (None, outer, None)
+        assert outer.children == [inner]
+        assert (outer.depth(), inner.depth(), self_loop.depth()) == (1, 2, 1)
+
+
+ALGORITHMS = ['chk', 'semi-nca']
+
+
+class TestDominators:
+
+    @pytest.mark.parametrize("algorithm", ALGORITHMS)
+    @pytest.mark.parametrize("seed", range(20))
+    def test_dominators(self, algorithm: str, seed: int):
+        for cfg in sample_cfgs(seed):
+            dominators = dominators_by_definition(cfg)
+            assert computeDom(cfg, algorithm) == dominators
+            # The immediate dominator is the strict dominator with most dominators
+            assert computeIdom(cfg, algorithm) == {
+                b: max(doms - {b}, key=lambda d: len(dominators[d]), default=None)
+                for b, doms in dominators.items()}
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_dominance_frontier(self, seed: int):
+        for cfg in sample_cfgs(seed):
+            dominators = dominators_by_definition(cfg)
+            DT = computeDT(cfg, dominators, False, "")
+            # b is in the frontier of the blocks dominating a predecessor
+            # of b without strictly dominating b
+            assert computeDF(cfg, dominators, DT, False, "") == {
+                a: {b for b in dominators for p in b.get_in()
+                    if a in dominators[p] and (a is b or a not in dominators[b])}
+                for a in dominators}
+
+    def test_deep_dominance_frontier(self):
+        depth = 20000
+        cfg = nested_ifs_cfg(depth)
+        blocks = list(cfg.get_blocks())[1:]  # Without the unreachable div_by_zero block
+        # From the immediate dominators: the sets of dominators would
+        # take O(depth^2) memory
+        DT: Dict[Block, Set[Block]] = {b: set() for b in cfg.get_blocks()}
+        for b, idom in computeIdom(cfg).items():
+            if idom is not None:
+                DT[idom].add(b)
+        DF = computeDF(cfg, {}, DT, False, "")
+        tests, innermost = blocks[:depth], blocks[depth]
+        joins = blocks[:depth:-1]  # The join block of each test
+        # The frontier of the i-th test and of its join block is the join
+        # block of the enclosing if
+        assert DF[tests[0]] == DF[joins[0]] == set()
+        for i in range(1, depth):
+            assert DF[tests[i]] == DF[joins[i]] == {joins[i - 1]}
+        assert DF[innermost] == {joins[depth - 1]}
+
+    @pytest.mark.parametrize("algorithm", ALGORITHMS)
+    @pytest.mark.parametrize("seed", range(20))
+    def test_dominator_tree(self, algorithm: str, seed: int):
+        for cfg in sample_cfgs(seed):
+            dominators = dominators_by_definition(cfg)
+            tree = computeDominatorTree(cfg, algorithm)
+            for b in dominators:
+                assert [a for a in dominators if tree.dominates(a, b)] == [
+                    a for a in dominators if a in dominators[b]]
+                assert tree.strictly_dominates(b, b) is False
+                assert tree.depth(b) == len(dominators[b]) - 1
+                idom = tree.idom(b)
+                if idom is None:
+                    assert dominators[b] == {b}
+                else:
+                    assert dominators[idom] == dominators[b] - {b}
+                assert set(tree.children(b)) == {
+                    c for c in dominators if dominators[c] - {c} == dominators[b]}
+
+    def test_deep_dominator_tree(self):
+        depth = 20000
+        cfg = nested_ifs_cfg(depth)
+        blocks = list(cfg.get_blocks())[1:]  # Without the unreachable div_by_zero block
+        tree = computeDominatorTree(cfg)
+        tests, innermost = blocks[:depth], blocks[depth]
+        joins = blocks[:depth:-1]  # The join block of each test
+        assert tree.depth(innermost) == depth
+        assert tree.dominates(tests[0], innermost)
+        assert not tree.dominates(innermost, tests[0])
+        assert not tree.dominates(tests[1], joins[0])
+        inside = tests[1:] + [innermost]  # The first block of each then branch
+        for i in range(depth):
+            assert tree.idom(inside[i]) is tree.idom(joins[i]) is tests[i]
+            assert set(tree.children(tests[i])) == {inside[i], joins[i]}
+
+
+class TestDefUse:
+
+    def test_updated_with_the_blocks(self):
+        fdata = FunctionData("f")
+        blocks = returning_blocks(fdata, 2)
+        blocks[0].set_terminator(AbsoluteJump(blocks[1].get_label()))
+        cfg = new_cfg(fdata, blocks)
+        t1, t2, t3 = fdata.fresh_tmp(), fdata.fresh_tmp(), fdata.fresh_tmp()
+        blocks[0].add_instruction(RiscV.mv(t1, t2))
+        def_use = cfg.analyses.get("def_use")
+        assert def_use.def_site(t1)[0] is blocks[0]
+        blocks[1].add_instruction(RiscV.add(t3, t1, t1))
+        blocks[1].set_terminator(BranchingTerminator(
+            Condition(MiniCParser.LT), t3, Immediate(0),
+            blocks[0].get_label(), blocks[1].get_label()))
+        assert [pos for _, pos, _ in def_use.use_sites(t3)] == [1]
+        # Modified without the methods of Block, then reported
+        blocks[0]._instructions = [RiscV.mv(t2, t1)]
+        cfg.block_changed(blocks[0])
+        assert cfg.analyses.get("def_use") is def_use
+        assert def_use.def_site(t1) is None
+        assert def_use.def_blocks() == cfg.gather_defs()
+        assert def_use.uses() == cfg.gather_uses()
+
+    def test_unreported_change(self):
+        fdata = FunctionData("f")
+        blocks = returning_blocks(fdata, 1)
+        cfg = new_cfg(fdata, blocks)
+        t1, t2 = fdata.fresh_tmp(), fdata.fresh_tmp()
+        blocks[0].add_instruction(RiscV.mv(t1, t2))
+        cfg.analyses.get("def_use")
+        blocks[0].add_instruction(RiscV.mv(t2, t1))
+        cfg.analyses.get("def_use")
+        blocks[0]._instructions.append(RiscV.mv(t1, t1))
+        with pytest.raises(MiniCInternalError):
+            cfg.analyses.get("def_use")
+        cfg.block_changed(blocks[0])
+        assert len(cfg.analyses.get("def_use").def_sites(t1)) == 2